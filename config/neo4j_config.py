@@ -1,20 +1,30 @@
 
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 class Neo4jConfig:
     """Configuration for Neo4j database connection."""
     
+    _instance: Optional['Neo4jConfig'] = None
+    
     def __init__(self):
-        self.uri = os.getenv('NEO4J_URI', 'bolt://localhost:7687')
-        self.username = os.getenv('NEO4J_USERNAME', 'neo4j')
-        self.password = os.getenv('NEO4J_PASSWORD', 'password')
-        self.database = os.getenv('NEO4J_DATABASE', 'neo4j')
+        env = os.environ
+        
+        self.uri = env.get('NEO4J_URI', 'bolt://localhost:7687')
+        self.username = env.get('NEO4J_USERNAME', 'neo4j')
+        self.password = env.get('NEO4J_PASSWORD', 'password')
+        self.database = env.get('NEO4J_DATABASE', 'neo4j')
+        
+        # The defaults above hide unset variables, so validate_config checks this
+        self._missing_vars = [
+            var for var in ('NEO4J_URI', 'NEO4J_USERNAME', 'NEO4J_PASSWORD') if not env.get(var)
+        ]
         
         # Connection pool settings
         self.max_connection_lifetime = 3600  # 1 hour
-        self.max_connection_pool_size = 50
+        self.max_connection_pool_size = 100
         self.connection_acquisition_timeout = 60  # seconds
+        self.connection_timeout = 15  # seconds
         
         # Retry settings
         self.max_retry_time = 30  # seconds
@@ -30,6 +40,7 @@ class Neo4jConfig:
             'max_connection_lifetime': self.max_connection_lifetime,
             'max_connection_pool_size': self.max_connection_pool_size,
             'connection_acquisition_timeout': self.connection_acquisition_timeout,
+            'connection_timeout': self.connection_timeout,
             'max_retry_time': self.max_retry_time,
             'initial_retry_delay': self.initial_retry_delay,
             'multiplier': self.multiplier,
@@ -38,19 +49,18 @@ class Neo4jConfig:
     
     def validate_config(self) -> bool:
         """Validate configuration settings."""
-        required_vars = ['NEO4J_URI', 'NEO4J_USERNAME', 'NEO4J_PASSWORD']
-        
-        for var in required_vars:
-            if not os.getenv(var):
-                print(f"Warning: {var} environment variable not set")
-                return False
+        if self._missing_vars:
+            print(f"Warning: {self._missing_vars[0]} environment variable not set")
+            return False
         
         return True
     
     @classmethod
     def from_env(cls) -> 'Neo4jConfig':
-        """Create configuration from environment variables."""
-        return cls()
+        """Get the shared configuration built from environment variables."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
     
     def get_bolt_url(self) -> str:
         """Get formatted Bolt URL."""
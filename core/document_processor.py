@@ -1,13 +1,191 @@
 
 import os
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
+import numpy as np
 import pdfplumber
-import PyPDF2
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
 from io import BytesIO
 import re
-from datetime import datetime
 import hashlib
+import ctypes
+import threading
+import atexit
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from utils.token_counter import TokenCounter
+
+# Digest bytes of document hashes; stored hashes depend on it, so keep it fixed
+HASH_DIGEST_SIZE = 16
+
+# Digest bytes of chunk ids derived from the document hash and chunk content
+CHUNK_ID_DIGEST_SIZE = 8
+
+# Paragraph structure patterns
+_BULLET_RE = re.compile(r'^\s*[-•*]\s+')
+_NUMBERED_RE = re.compile(r'^\s*\d+\.\s+')
+
+# Vertical gap, relative to the previous line's height, that starts a new paragraph
+PARAGRAPH_GAP_RATIO = 0.5
+
+# Axis-aligned ruling segments of each direction a page needs before it is sent
+# to pdfplumber for tables; a lone border box only has two of each
+TABLE_MIN_RULINGS = 3
+
+# Shortest ruling segment counted (pdfplumber's edge_min_length) and how far, in
+# points, it may stray from horizontal or vertical
+RULING_MIN_LENGTH = 3.0
+RULING_TOLERANCE = 1.0
+
+# PDFium is not thread-safe; concurrent sessions extract on their own script threads
+_PDFIUM_LOCK = threading.Lock()
+
+# Pages each extraction worker should get. Handing a run of pages to a warm
+# worker (sending the PDF bytes, opening it there) costs about as much as
+# extracting three to nine text pages; sixteen keeps that under half its share
+PAGES_PER_WORKER = 16
+
+def _extract_page_range(pdf_bytes: bytes, start: int, stop: int) -> List[Dict[str, Any]]:
+    """Extract a run of pages inside a worker process, opening the PDF once for them."""
+    pdfium_pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+            return [_extract_page(pdf, pdfium_pdf, page_num) for page_num in range(start, stop)]
+    finally:
+        pdfium_pdf.close()
+
+def _joined_length(words: List[str]) -> int:
+    """Length of the words once joined with single spaces."""
+    return sum(map(len, words)) + max(len(words) - 1, 0)
+
+def _has_table_rulings(pdfium_page) -> bool:
+    """Whether the page draws enough horizontal and vertical line segments to form a table grid.
+    
+    Curves, short ticks and slanted lines are ignored, so decorative shapes and
+    single rules or boxes do not send the page through layout analysis.
+    """
+    horizontal = vertical = 0
+    x, y = ctypes.c_float(), ctypes.c_float()
+    for path in pdfium_page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_PATH]):
+        start = previous = None
+        for segment_idx in range(pdfium_c.FPDFPath_CountSegments(path.raw)):
+            segment = pdfium_c.FPDFPath_GetPathSegment(path.raw, segment_idx)
+            pdfium_c.FPDFPathSegment_GetPoint(segment, x, y)
+            point = (x.value, y.value)
+            
+            segment_type = pdfium_c.FPDFPathSegment_GetType(segment)
+            edges = []
+            if segment_type == pdfium_c.FPDF_SEGMENT_MOVETO:
+                start = point
+            elif segment_type == pdfium_c.FPDF_SEGMENT_LINETO and previous:
+                edges.append((previous, point))
+            # Rectangles close their last edge implicitly
+            if pdfium_c.FPDFPathSegment_GetClose(segment) and start:
+                edges.append((point, start))
+            previous = point
+            
+            for (x0, y0), (x1, y1) in edges:
+                dx, dy = abs(x1 - x0), abs(y1 - y0)
+                if dy <= RULING_TOLERANCE and dx >= RULING_MIN_LENGTH:
+                    horizontal += 1
+                elif dx <= RULING_TOLERANCE and dy >= RULING_MIN_LENGTH:
+                    vertical += 1
+            if horizontal >= TABLE_MIN_RULINGS and vertical >= TABLE_MIN_RULINGS:
+                return True
+    return False
+
+def _pdfium_text_lines(pdfium_page) -> List[Dict[str, Any]]:
+    """Positioned text lines from pdfium, shaped like pdfplumber's extract_text_lines()."""
+    textpage = pdfium_page.get_textpage()
+    page_height = pdfium_page.get_height()
+    lines = []
+    try:
+        for rect_idx in range(textpage.count_rects()):
+            left, bottom, right, top = textpage.get_rect(rect_idx)
+            lines.append({
+                'text': textpage.get_text_bounded(left, bottom, right, top),
+                'top': page_height - top,
+                'bottom': page_height - bottom
+            })
+    finally:
+        textpage.close()
+    return lines
+
+def _extract_page(pdf, pdfium_pdf, page_num: int) -> Dict[str, Any]:
+    """Extract text, tables and paragraphs from one page."""
+    pdfium_page = pdfium_pdf[page_num]
+    try:
+        if _has_table_rulings(pdfium_page):
+            # Possible ruled tables: run pdfplumber's layout analysis
+            page = pdf.pages[page_num]
+            try:
+                return _extract_layout_page(page, page_num)
+            finally:
+                page.close()
+        
+        # Text-only page: pdfium's native text extraction is much faster than
+        # pdfplumber's pure-Python layout analysis and finds the same lines
+        lines = _pdfium_text_lines(pdfium_page)
+    finally:
+        pdfium_page.close()
+    
+    return {
+        'page_number': page_num + 1,
+        'text': '\n'.join(line['text'] for line in lines),
+        'tables': [],
+        'paragraphs': DocumentProcessor._paragraphs_from_lines(lines)
+    }
+
+def _extract_layout_page(page, page_num: int) -> Dict[str, Any]:
+    """Extract text, tables and paragraphs from one pdfplumber page."""
+    # Lines carry their vertical position, so paragraphs can be found from the
+    # layout directly instead of re-splitting the joined page text
+    lines = page.extract_text_lines()
+    page_content = {
+        'page_number': page_num + 1,
+        'text': '\n'.join(line['text'] for line in lines),
+        'tables': [],
+        'paragraphs': DocumentProcessor._paragraphs_from_lines(lines)
+    }
+    
+    # Extract tables
+    page_tables = page.extract_tables()
+    if page_tables:
+        for table_idx, table in enumerate(page_tables):
+            if table:
+                page_content['tables'].append({
+                    'table_id': f"table_{page_num + 1}_{table_idx + 1}",
+                    'page_number': page_num + 1,
+                    'data': table
+                })
+    
+    return page_content
+
+@dataclass
+class ChunkBatch:
+    """Column-oriented view of a list of chunk dicts for vectorized aggregates."""
+    chunk_ids: List[Any]
+    page_numbers: np.ndarray
+    word_counts: np.ndarray
+    char_counts: np.ndarray
+    contents: List[str]
+    
+    @classmethod
+    def from_chunks(cls, chunks: List[Dict[str, Any]]) -> 'ChunkBatch':
+        """Build the columns from chunk dicts in one pass."""
+        count = len(chunks)
+        return cls(
+            chunk_ids=[chunk['chunk_id'] for chunk in chunks],
+            page_numbers=np.fromiter((chunk['page_number'] for chunk in chunks), dtype=np.int32, count=count),
+            word_counts=np.fromiter((chunk['word_count'] for chunk in chunks), dtype=np.int32, count=count),
+            char_counts=np.fromiter((chunk['char_count'] for chunk in chunks), dtype=np.int32, count=count),
+            contents=[chunk['content'] for chunk in chunks]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.contents)
 
 class DocumentProcessor:
     """Handles PDF document processing, chunking, and metadata extraction."""
@@ -16,62 +194,72 @@ class DocumentProcessor:
         self.logger = logging.getLogger(__name__)
         self.chunk_size = 1000
         self.chunk_overlap = 200
+        self.token_counter = TokenCounter()
+        
+        # Page extraction runs in a process pool once there are pages enough
+        # for at least two workers
+        self.max_workers = os.cpu_count() or 1
+        self.pages_per_worker = PAGES_PER_WORKER
+        self._page_pool = None
+        self._page_pool_lock = threading.Lock()
+    
+    def _get_page_pool(self) -> ProcessPoolExecutor:
+        """Get the page-extraction pool, started on first use and kept for the process."""
+        with self._page_pool_lock:
+            if self._page_pool is None:
+                # Spawned, not forked, as forking the threaded server can deadlock
+                self._page_pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                      mp_context=multiprocessing.get_context('spawn'))
+                atexit.register(self._page_pool.shutdown)
+            return self._page_pool
         
     def extract_pdf_content(self, pdf_file: BytesIO) -> Dict[str, Any]:
         """Extract content and metadata from PDF file."""
         try:
             # Reset file pointer
             pdf_file.seek(0)
+            pdf_bytes = pdf_file.read()
             
-            # Extract metadata using PyPDF2
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            metadata = {
-                'title': pdf_reader.metadata.get('/Title', '') if pdf_reader.metadata else '',
-                'author': pdf_reader.metadata.get('/Author', '') if pdf_reader.metadata else '',
-                'creator': pdf_reader.metadata.get('/Creator', '') if pdf_reader.metadata else '',
-                'producer': pdf_reader.metadata.get('/Producer', '') if pdf_reader.metadata else '',
-                'creation_date': pdf_reader.metadata.get('/CreationDate', '') if pdf_reader.metadata else '',
-                'modification_date': pdf_reader.metadata.get('/ModDate', '') if pdf_reader.metadata else '',
-                'num_pages': len(pdf_reader.pages)
-            }
-            
-            # Reset file pointer for pdfplumber
-            pdf_file.seek(0)
+            with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+                # Metadata comes from the same parse as the page content
+                pdf_metadata = pdf.metadata or {}
+                metadata = {
+                    'title': pdf_metadata.get('Title', ''),
+                    'author': pdf_metadata.get('Author', ''),
+                    'creator': pdf_metadata.get('Creator', ''),
+                    'producer': pdf_metadata.get('Producer', ''),
+                    'creation_date': pdf_metadata.get('CreationDate', ''),
+                    'modification_date': pdf_metadata.get('ModDate', ''),
+                    'num_pages': len(pdf.pages)
+                }
+                
+                num_pages = len(pdf.pages)
+                workers = min(self.max_workers, num_pages // self.pages_per_worker)
+                
+                if workers > 1:
+                    # Layout analysis is pure Python, so fan pages out to processes,
+                    # one contiguous run per worker so each opens the PDF once
+                    pool = self._get_page_pool()
+                    run_length = -(-num_pages // workers)
+                    futures = [
+                        pool.submit(_extract_page_range, pdf_bytes, start, min(start + run_length, num_pages))
+                        for start in range(0, num_pages, run_length)
+                    ]
+                    pages_content = [page for future in futures for page in future.result()]
+                else:
+                    with _PDFIUM_LOCK:
+                        pdfium_pdf = pdfium.PdfDocument(pdf_bytes)
+                        try:
+                            pages_content = [_extract_page(pdf, pdfium_pdf, page_num) for page_num in range(num_pages)]
+                        finally:
+                            pdfium_pdf.close()
             
-            # Extract text and structure using pdfplumber
-            pages_content = []
-            tables = []
-            
-            with pdfplumber.open(pdf_file) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    page_content = {
-                        'page_number': page_num + 1,
-                        'text': page.extract_text() or '',
-                        'tables': [],
-                        'paragraphs': []
-                    }
-                    
-                    # Extract tables
-                    page_tables = page.extract_tables()
-                    if page_tables:
-                        for table_idx, table in enumerate(page_tables):
-                            if table:
-                                table_data = {
-                                    'table_id': f"table_{page_num + 1}_{table_idx + 1}",
-                                    'page_number': page_num + 1,
-                                    'data': table
-                                }
-                                page_content['tables'].append(table_data)
-                                tables.append(table_data)
-                    
-                    # Extract paragraphs
-                    if page_content['text']:
-                        paragraphs = self._extract_paragraphs(page_content['text'])
-                        page_content['paragraphs'] = paragraphs
-                    
-                    pages_content.append(page_content)
+            tables = [table for page in pages_content for table in page['tables']]
             
             return {
+                # Hashed from the bytes already in memory, so the file is not read again
+                'file_hash': self.generate_document_hash(pdf_bytes),
+                'legacy_file_hash': self.generate_legacy_document_hash(pdf_bytes),
                 'metadata': metadata,
                 'pages': pages_content,
                 'tables': tables,
@@ -82,82 +270,101 @@ class DocumentProcessor:
             self.logger.error(f"Error extracting PDF content: {str(e)}")
             raise
     
-    def _extract_paragraphs(self, text: str) -> List[Dict[str, Any]]:
-        """Extract paragraphs from text while preserving structure."""
+    @staticmethod
+    def _paragraphs_from_lines(lines: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Group positioned text lines into paragraphs using vertical gaps."""
         paragraphs = []
+        current_lines = []
+        prev_line = None
         
-        # Split by double newlines to identify paragraphs
-        raw_paragraphs = re.split(r'\n\s*\n', text)
+        for line in lines:
+            if prev_line is not None:
+                gap = line['top'] - prev_line['bottom']
+                line_height = prev_line['bottom'] - prev_line['top']
+                if gap > PARAGRAPH_GAP_RATIO * line_height and current_lines:
+                    paragraphs.append(DocumentProcessor._paragraph_entry(len(paragraphs) + 1, '\n'.join(current_lines)))
+                    current_lines = []
+            
+            text = line['text'].strip()
+            if text:
+                current_lines.append(text)
+            prev_line = line
         
-        for idx, paragraph in enumerate(raw_paragraphs):
-            if paragraph.strip():
-                # Detect bullet points
-                is_bullet = bool(re.match(r'^\s*[-•*]\s+', paragraph.strip()))
-                
-                # Detect numbered lists
-                is_numbered = bool(re.match(r'^\s*\d+\.\s+', paragraph.strip()))
-                
-                paragraphs.append({
-                    'paragraph_id': idx + 1,
-                    'text': paragraph.strip(),
-                    'is_bullet': is_bullet,
-                    'is_numbered': is_numbered,
-                    'word_count': len(paragraph.split())
-                })
+        if current_lines:
+            paragraphs.append(DocumentProcessor._paragraph_entry(len(paragraphs) + 1, '\n'.join(current_lines)))
         
         return paragraphs
     
-    def create_semantic_chunks(self, document_content: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Create semantic chunks from document content."""
+    @staticmethod
+    def _paragraph_entry(paragraph_id: int, para_text: str) -> Dict[str, Any]:
+        """Build the paragraph record for already-stripped text."""
+        return {
+            'paragraph_id': paragraph_id,
+            'text': para_text,
+            'is_bullet': bool(_BULLET_RE.match(para_text)),
+            'is_numbered': bool(_NUMBERED_RE.match(para_text)),
+            'word_count': len(para_text.split())
+        }
+    
+    def create_semantic_chunks(self, document_content: Dict[str, Any], chunk_size: Optional[int] = None,
+                               chunk_overlap: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Create semantic chunks from document content.
+        
+        chunk_size and chunk_overlap override the processor's defaults for this
+        call only, so a shared processor is never reconfigured.
+        """
+        chunk_size = self.chunk_size if chunk_size is None else chunk_size
+        chunk_overlap = self.chunk_overlap if chunk_overlap is None else chunk_overlap
         chunks = []
         chunk_id = 1
         
         for page in document_content['pages']:
             page_num = page['page_number']
             
-            # Process paragraphs
-            current_chunk = ""
+            # Process paragraphs, tracking words and joined length incrementally
+            current_words = []
+            current_char_count = 0
             current_chunk_paras = []
             
             for paragraph in page['paragraphs']:
                 para_text = paragraph['text']
+                para_words = para_text.split()
                 
                 # Check if adding this paragraph would exceed chunk size
-                if len(current_chunk + para_text) > self.chunk_size and current_chunk:
+                if current_words and current_char_count + len(para_text) > chunk_size:
                     # Save current chunk
                     chunks.append({
                         'chunk_id': chunk_id,
-                        'content': current_chunk.strip(),
+                        'content': ' '.join(current_words),
                         'page_number': page_num,
                         'paragraph_numbers': current_chunk_paras,
-                        'word_count': len(current_chunk.split()),
-                        'char_count': len(current_chunk),
+                        'word_count': len(current_words),
+                        'char_count': current_char_count,
                         'chunk_type': 'paragraph'
                     })
                     
                     chunk_id += 1
                     
                     # Start new chunk with overlap
-                    if self.chunk_overlap > 0:
-                        overlap_words = current_chunk.split()[-self.chunk_overlap:]
-                        current_chunk = ' '.join(overlap_words) + ' ' + para_text
-                    else:
-                        current_chunk = para_text
-                    
-                    current_chunk_paras = [paragraph['paragraph_id']]
-                else:
-                    current_chunk += ' ' + para_text if current_chunk else para_text
-                    current_chunk_paras.append(paragraph['paragraph_id'])
+                    current_words = current_words[-chunk_overlap:] if chunk_overlap > 0 else []
+                    current_char_count = _joined_length(current_words)
+                    current_chunk_paras = []
+                
+                if current_words:
+                    current_char_count += 1
+                current_char_count += _joined_length(para_words)
+                current_words.extend(para_words)
+                current_chunk_paras.append(paragraph['paragraph_id'])
             
             # Add remaining chunk
-            if current_chunk.strip():
+            if current_words:
                 chunks.append({
                     'chunk_id': chunk_id,
-                    'content': current_chunk.strip(),
+                    'content': ' '.join(current_words),
                     'page_number': page_num,
                     'paragraph_numbers': current_chunk_paras,
-                    'word_count': len(current_chunk.split()),
-                    'char_count': len(current_chunk),
+                    'word_count': len(current_words),
+                    'char_count': current_char_count,
                     'chunk_type': 'paragraph'
                 })
                 chunk_id += 1
@@ -194,19 +401,45 @@ class DocumentProcessor:
     
     def calculate_processing_cost(self, chunks: List[Dict[str, Any]], cost_per_token: float = 0.0001) -> Dict[str, Any]:
         """Calculate estimated processing cost for chunks."""
-        total_tokens = sum(chunk['word_count'] * 1.3 for chunk in chunks)  # Approximate token count
+        batch = ChunkBatch.from_chunks(chunks)
+        token_counts = self.token_counter.count_batch(batch.contents)
+        total_tokens = int(np.sum(token_counts, dtype=np.int64))
         total_cost = total_tokens * cost_per_token
         
         return {
-            'total_chunks': len(chunks),
-            'estimated_tokens': int(total_tokens),
+            'total_chunks': len(batch),
+            'total_words': int(batch.word_counts.sum(dtype=np.int64)),
+            'estimated_tokens': total_tokens,
             'estimated_cost': round(total_cost, 4),
-            'cost_per_chunk': round(total_cost / len(chunks), 4) if chunks else 0
+            'cost_per_chunk': round(total_cost / len(batch), 4) if len(batch) else 0
         }
     
-    def generate_document_hash(self, pdf_file: BytesIO) -> str:
+    def assign_chunk_ids(self, chunks: List[Dict[str, Any]], file_hash: str) -> List[Dict[str, Any]]:
+        """Replace sequential chunk ids with ids derived from the file and chunk content.
+        
+        The same file chunked the same way always gets the same ids, and ids
+        never collide across documents, unlike the per-document sequence.
+        """
+        for position, chunk in enumerate(chunks):
+            digest = hashlib.blake2b(f"{file_hash}:{position}:".encode('utf-8'), digest_size=CHUNK_ID_DIGEST_SIZE)
+            digest.update(chunk['content'].encode('utf-8'))
+            chunk['chunk_id'] = digest.hexdigest()
+        return chunks
+    
+    def generate_document_hash(self, pdf_file: Union[bytes, BytesIO]) -> str:
         """Generate unique hash for document."""
+        return hashlib.blake2b(self._document_bytes(pdf_file), digest_size=HASH_DIGEST_SIZE).hexdigest()
+    
+    def generate_legacy_document_hash(self, pdf_file: Union[bytes, BytesIO]) -> str:
+        """Generate the MD5 hash documents were stored under before BLAKE2b, for duplicate checks."""
+        return hashlib.md5(self._document_bytes(pdf_file), usedforsecurity=False).hexdigest()
+    
+    @staticmethod
+    def _document_bytes(pdf_file: Union[bytes, BytesIO]) -> bytes:
+        """Get the bytes of a document given as bytes or as a stream, leaving the stream rewound."""
+        if isinstance(pdf_file, bytes):
+            return pdf_file
         pdf_file.seek(0)
         content = pdf_file.read()
         pdf_file.seek(0)
-        return hashlib.md5(content).hexdigest()
+        return content
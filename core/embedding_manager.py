@@ -1,39 +1,119 @@
 
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Optional
 import logging
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import pickle
+from scipy.sparse import csr_matrix
+import json
 import os
+import importlib
+import re
+from collections import OrderedDict
+
+# Vectorizer settings persisted alongside saved embeddings
+VECTORIZER_STATE_PARAMS = (
+    'lowercase', 'stop_words', 'ngram_range', 'norm',
+    'use_idf', 'smooth_idf', 'sublinear_tf'
+)
+
+# Whitespace runs collapsed when normalizing query cache keys
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Neighbours per node in the HNSW graph, and candidate list sizes used
+# while building and searching it
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# Below this many rows an exact scan beats building an ANN index
+ANN_MIN_ROWS = 1000
+
+# Largest magnitude of a symmetric int8 code
+INT8_SCALE = 127.0
+
+# On-disk dtype of saved embeddings. Passing np.float16 to save_embeddings
+# halves the file; TF-IDF weights lie in [0, 1], where it keeps about three
+# significant digits
+SAVED_EMBEDDING_DTYPE = np.float32
+
+def _import_optional(module_name: str):
+    """Import an optional dependency on first use, or return None if it is missing."""
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+
+def _top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the top_k highest scores, best first."""
+    # argpartition selects the candidates in O(N); only those k get sorted
+    k = min(top_k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+class DedupTfidfVectorizer(TfidfVectorizer):
+    """TfidfVectorizer that analyzes and counts each distinct text once.
+
+    Count rows are broadcast back to every repeat before min_df, max_df and
+    the idf weights are computed, so results match TfidfVectorizer exactly.
+    """
+
+    def _count_vocab(self, raw_documents, fixed_vocab):
+        unique_idx = {}
+        inverse = np.fromiter((unique_idx.setdefault(text, len(unique_idx)) for text in raw_documents),
+                              dtype=np.intp)
+        vocabulary, counts = super()._count_vocab(list(unique_idx), fixed_vocab)
+        return vocabulary, counts[inverse]
 
 class EmbeddingManager:
     """Manages document embeddings using TF-IDF vectorization."""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.vectorizer = TfidfVectorizer(
+        self.vectorizer = DedupTfidfVectorizer(
             max_features=1000,
             stop_words='english',
             ngram_range=(1, 2),
             max_df=0.95,
-            min_df=2
+            min_df=2,
+            norm='l2'
         )
         self.embeddings_cache = {}
         self.fitted = False
         
-    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
-        """Generate TF-IDF embeddings for a list of texts."""
+        # Query text -> embedding, only valid for the current vectorizer fit
+        self._query_cache: OrderedDict = OrderedDict()
+        self.query_cache_size = 4096
+        
+        # Normalized float32 embeddings of the last processed chunks, one row
+        # per chunk, plus the nearest-neighbour index built over them
+        self.embedding_matrix = None
+        self.index = None
+        self.index_backend = None
+        
+        # Exact scans use int8 rows with per-row scales instead of float32
+        # when enabled; float32 stays the default
+        self.use_int8_search = False
+        self.quantized_matrix = None
+        self.quantized_scales = None
+        
+    def generate_embeddings(self, texts: List[str]) -> csr_matrix:
+        """Generate sparse TF-IDF embeddings for a list of texts."""
         try:
+            # Repeated boilerplate (headers, table stubs) is tokenized and
+            # counted once by the vectorizer, whether fitting or not
             if not self.fitted:
-                # Fit the vectorizer on the texts
                 embeddings = self.vectorizer.fit_transform(texts)
                 self.fitted = True
+                self._query_cache.clear()
             else:
-                # Transform using the already fitted vectorizer
                 embeddings = self.vectorizer.transform(texts)
             
-            return embeddings.toarray()
+            return embeddings
             
         except Exception as e:
             self.logger.error(f"Error generating embeddings: {str(e)}")
@@ -41,19 +121,43 @@ class EmbeddingManager:
     
     def generate_single_embedding(self, text: str) -> np.ndarray:
         """Generate embedding for a single text."""
-        if not self.fitted:
+        key = self._query_key(text)
+        if self.fitted:
+            cached = self._query_cache.get(key)
+            if cached is not None:
+                self._query_cache.move_to_end(key)
+                return cached
+            embedding = self.vectorizer.transform([text]).toarray()[0]
+        else:
             # If not fitted, fit on this single text (not ideal but works)
-            embedding = self.vectorizer.fit_transform([text])
+            embedding = self.vectorizer.fit_transform([text]).toarray()[0]
             self.fitted = True
-        else:
-            embedding = self.vectorizer.transform([text])
+            self._query_cache.clear()
+        
+        # Cached arrays are shared between callers, so keep them immutable
+        embedding.setflags(write=False)
+        self._query_cache[key] = embedding
+        if len(self._query_cache) > self.query_cache_size:
+            self._query_cache.popitem(last=False)
         
-        return embedding.toarray()[0]
+        return embedding
     
-    def calculate_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
+    def _query_key(self, text: str) -> str:
+        """Cache key for a query; texts the vectorizer cannot tell apart share one."""
+        # Tokenization ignores whitespace runs and, by default, case
+        key = _WHITESPACE_RE.sub(' ', text.strip())
+        return key.lower() if self.vectorizer.lowercase else key
+    
+    def calculate_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray,
+                             normalized: bool = False) -> float:
         """Calculate cosine similarity between two embeddings."""
         try:
-            similarity = cosine_similarity([embedding1], [embedding2])[0][0]
+            # TF-IDF rows are already unit length (norm='l2'), so cosine
+            # similarity is just their dot product
+            if not normalized:
+                embedding1 = self._normalize_vector(embedding1)
+                embedding2 = self._normalize_vector(embedding2)
+            similarity = np.dot(np.ravel(embedding1), np.ravel(embedding2))
             return float(similarity)
         except Exception as e:
             self.logger.error(f"Error calculating similarity: {str(e)}")
@@ -61,95 +165,257 @@ class EmbeddingManager:
     
     def find_similar_chunks(self, query_embedding: np.ndarray, 
                            chunk_embeddings: List[np.ndarray], 
-                           top_k: int = 5) -> List[Dict[str, Any]]:
+                           top_k: int = 5,
+                           normalized: bool = False,
+                           scales: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
         """Find most similar chunks to a query embedding."""
         try:
-            similarities = []
+            if len(chunk_embeddings) == 0:
+                return []
+            
+            query = self._normalize_vector(query_embedding)
             
-            for idx, chunk_embedding in enumerate(chunk_embeddings):
-                similarity = self.calculate_similarity(query_embedding, chunk_embedding)
-                similarities.append({
-                    'chunk_index': idx,
-                    'similarity_score': similarity
-                })
+            if isinstance(chunk_embeddings, np.ndarray) and chunk_embeddings.dtype == np.int8:
+                # Quantized rows: int8 dot products accumulated in int32, then
+                # rescaled by the row and query scales
+                if scales is None:
+                    scales = np.full(len(chunk_embeddings), 1.0 / INT8_SCALE, dtype=np.float32)
+                query_q, query_scale = self._quantize_rows(query[None, :])
+                similarities = (chunk_embeddings.astype(np.int32) @ query_q[0].astype(np.int32)) * (scales * query_scale[0])
+            else:
+                # Stack and L2-normalize once so scoring is a single matrix-vector
+                # product; callers holding unit-length rows skip the row norms
+                embedding_matrix = np.asarray(chunk_embeddings, dtype=np.float32)
+                if not normalized:
+                    embedding_matrix = self._normalize_rows(embedding_matrix)
+                similarities = embedding_matrix @ query
             
-            # Sort by similarity score in descending order
-            similarities.sort(key=lambda x: x['similarity_score'], reverse=True)
+            top_indices = _top_k_indices(similarities, top_k)
             
-            return similarities[:top_k]
+            return [
+                {'chunk_index': int(idx), 'similarity_score': float(similarities[idx])}
+                for idx in top_indices
+            ]
             
         except Exception as e:
             self.logger.error(f"Error finding similar chunks: {str(e)}")
             return []
     
+    def build_index(self, embeddings: np.ndarray):
+        """Build a nearest-neighbour index over chunk embeddings."""
+        if hasattr(embeddings, 'toarray'):
+            embeddings = embeddings.toarray()
+        matrix = np.ascontiguousarray(self._normalize_rows(np.asarray(embeddings, dtype=np.float32)))
+        
+        self.index, self.index_backend = None, None
+        if len(matrix) >= ANN_MIN_ROWS:
+            # ANN backends are only imported once an index is actually needed.
+            # Inner product on normalized rows is cosine similarity.
+            faiss = _import_optional('faiss')
+            hnswlib = _import_optional('hnswlib') if faiss is None else None
+            if faiss is not None:
+                index = faiss.IndexHNSWFlat(matrix.shape[1], HNSW_M, faiss.METRIC_INNER_PRODUCT)
+                index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+                index.add(matrix)
+                self.index, self.index_backend = index, 'faiss'
+            elif hnswlib is not None:
+                index = hnswlib.Index(space='ip', dim=matrix.shape[1])
+                index.init_index(max_elements=len(matrix), ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+                index.add_items(matrix, np.arange(len(matrix)))
+                self.index, self.index_backend = index, 'hnswlib'
+        
+        self.embedding_matrix = matrix
+        if self.use_int8_search:
+            self.quantized_matrix, self.quantized_scales = self._quantize_rows(matrix)
+        else:
+            self.quantized_matrix, self.quantized_scales = None, None
+    
+    def search_index(self, query_embedding: np.ndarray, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Find the chunks closest to a query using the index from build_index."""
+        if self.embedding_matrix is None or len(self.embedding_matrix) == 0:
+            return []
+        
+        if self.index is None:
+            # Small matrix or no ANN backend installed - exact scan over the same matrix
+            if self.use_int8_search:
+                return self.find_similar_chunks(query_embedding, self.quantized_matrix, top_k,
+                                                scales=self.quantized_scales)
+            return self.find_similar_chunks(query_embedding, self.embedding_matrix, top_k, normalized=True)
+        
+        query = self._normalize_vector(query_embedding)[None, :]
+        k = min(top_k, len(self.embedding_matrix))
+        if self.index_backend == 'hnswlib':
+            self.index.set_ef(max(HNSW_EF_SEARCH, k))
+            ids, distances = self.index.knn_query(query, k=k)
+            # hnswlib's inner-product distance is 1 - similarity
+            scores = 1.0 - distances
+        else:
+            self.index.hnsw.efSearch = max(HNSW_EF_SEARCH, k)
+            scores, ids = self.index.search(query, k)
+        
+        return [
+            {'chunk_index': int(idx), 'similarity_score': float(score)}
+            for score, idx in zip(scores[0], ids[0])
+            if idx != -1
+        ]
+    
+    def save_index(self, filepath: str) -> bool:
+        """Save the ANN index from build_index to disk."""
+        try:
+            if self.index is None:
+                self.logger.warning("No ANN index to save")
+                return False
+            
+            if self.index_backend == 'hnswlib':
+                self.index.save_index(filepath)
+            else:
+                _import_optional('faiss').write_index(self.index, filepath)
+            
+            self.logger.info(f"Index saved to {filepath}")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Error saving index: {str(e)}")
+            return False
+    
+    def get_chunk_embedding(self, chunk: Dict[str, Any]) -> np.ndarray:
+        """Get the embedding row for a chunk processed by batch_process_chunks."""
+        return self.embedding_matrix[chunk['embedding_idx']]
+    
+    def quantize_embeddings(self, embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Quantize embeddings to int8 for compact storage and search."""
+        if hasattr(embeddings, 'toarray'):
+            embeddings = embeddings.toarray()
+        normalized = self._normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        return self._quantize_rows(normalized)
+    
+    @staticmethod
+    def _quantize_rows(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Symmetric per-row int8 quantization; returns the codes and row scales."""
+        # Each row uses its full [-127, 127] range, which keeps sparse TF-IDF
+        # rows with small maxima from collapsing to a few codes
+        scales = np.abs(matrix).max(axis=1) / INT8_SCALE
+        scales[scales == 0] = 1.0
+        quantized = np.round(matrix / scales[:, None]).astype(np.int8)
+        return np.ascontiguousarray(quantized), scales.astype(np.float32)
+    
+    @staticmethod
+    def _normalize_vector(vector: np.ndarray) -> np.ndarray:
+        """Flatten a vector to float32 and scale it to unit length."""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    @staticmethod
+    def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+        """L2-normalize the rows of a dense matrix, leaving zero rows untouched."""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+    
     def semantic_search(self, query: str, documents: List[Dict[str, Any]], 
                        top_k: int = 5) -> List[Dict[str, Any]]:
         """Perform semantic search on documents."""
         try:
+            if not documents:
+                return []
+            
             # Extract text content from documents
             doc_texts = [doc.get('content', '') for doc in documents]
             
-            # Generate embeddings for all documents
+            # Rows come out of the vectorizer L2-normalized, so cosine
+            # similarity reduces to a bare sparse-dense dot product
             doc_embeddings = self.generate_embeddings(doc_texts)
-            
-            # Generate embedding for query
             query_embedding = self.generate_single_embedding(query)
             
-            # Calculate similarities
-            similarities = []
-            for idx, doc_embedding in enumerate(doc_embeddings):
-                similarity = self.calculate_similarity(query_embedding, doc_embedding)
-                result = documents[idx].copy()
-                result['similarity_score'] = similarity
-                similarities.append(result)
+            similarities = np.asarray(doc_embeddings @ query_embedding).ravel()
             
-            # Sort by similarity
-            similarities.sort(key=lambda x: x['similarity_score'], reverse=True)
+            top_indices = _top_k_indices(similarities, top_k)
             
-            return similarities[:top_k]
+            results = []
+            for rank, idx in enumerate(top_indices, start=1):
+                result = documents[idx].copy()
+                result['similarity_score'] = float(similarities[idx])
+                result['rank'] = rank
+                results.append(result)
+            
+            return results
             
         except Exception as e:
             self.logger.error(f"Error in semantic search: {str(e)}")
             return []
     
-    def save_embeddings(self, embeddings: np.ndarray, file_path: str):
-        """Save embeddings to file."""
+    def save_embeddings(self, embeddings: np.ndarray, file_path: str,
+                        dtype: np.dtype = SAVED_EMBEDDING_DTYPE):
+        """Save embeddings to an .npy file with a JSON sidecar for the vectorizer."""
         try:
-            with open(file_path, 'wb') as f:
-                pickle.dump({
-                    'embeddings': embeddings,
-                    'vectorizer': self.vectorizer
+            embeddings_path, vectorizer_path = self._embedding_paths(file_path)
+            if hasattr(embeddings, 'toarray'):
+                embeddings = embeddings.toarray()
+            np.save(embeddings_path, np.asarray(embeddings, dtype=dtype))
+            
+            params = self.vectorizer.get_params()
+            with open(vectorizer_path, 'w') as f:
+                json.dump({
+                    'params': {key: params[key] for key in VECTORIZER_STATE_PARAMS},
+                    'vocabulary': {term: int(idx) for term, idx in self.vectorizer.vocabulary_.items()},
+                    'idf': self.vectorizer.idf_.tolist()
                 }, f)
-            self.logger.info(f"Embeddings saved to {file_path}")
+            self.logger.info(f"Embeddings saved to {embeddings_path}")
         except Exception as e:
             self.logger.error(f"Error saving embeddings: {str(e)}")
     
     def load_embeddings(self, file_path: str) -> np.ndarray:
-        """Load embeddings from file."""
+        """Load embeddings as float32 and restore the vectorizer.
+        
+        float32 files are memory-mapped read-only; files saved at another
+        precision are upcast into memory, since float16 math is slow on CPU.
+        """
         try:
-            if os.path.exists(file_path):
-                with open(file_path, 'rb') as f:
-                    data = pickle.load(f)
-                    self.vectorizer = data['vectorizer']
-                    self.fitted = True
-                    self.logger.info(f"Embeddings loaded from {file_path}")
-                    return data['embeddings']
+            embeddings_path, vectorizer_path = self._embedding_paths(file_path)
+            if os.path.exists(embeddings_path) and os.path.exists(vectorizer_path):
+                with open(vectorizer_path) as f:
+                    state = json.load(f)
+                params = state['params']
+                params['ngram_range'] = tuple(params['ngram_range'])
+                vectorizer = DedupTfidfVectorizer(vocabulary=state['vocabulary'], **params)
+                vectorizer.idf_ = np.asarray(state['idf'])
+                
+                self.vectorizer = vectorizer
+                self.fitted = True
+                self._query_cache.clear()
+                self.logger.info(f"Embeddings loaded from {embeddings_path}")
+                # Pages are read from disk only when rows are touched
+                embeddings = np.load(embeddings_path, mmap_mode='r')
+                if embeddings.dtype != np.float32:
+                    embeddings = embeddings.astype(np.float32)
+                return embeddings
             else:
-                self.logger.warning(f"Embeddings file not found: {file_path}")
+                self.logger.warning(f"Embeddings file not found: {embeddings_path}")
                 return np.array([])
         except Exception as e:
             self.logger.error(f"Error loading embeddings: {str(e)}")
             return np.array([])
     
+    @staticmethod
+    def _embedding_paths(file_path: str) -> Tuple[str, str]:
+        """Get the array and vectorizer sidecar paths for an embeddings file."""
+        base = file_path[:-len('.npy')] if file_path.endswith('.npy') else file_path
+        return f"{base}.npy", f"{base}.vectorizer.json"
+    
     def batch_process_chunks(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Process chunks in batches to generate embeddings."""
+        """Process a document's chunks, fitting the vectorizer to them, to generate embeddings."""
         try:
             texts = [chunk.get('content', '') for chunk in chunks]
+            # Each document gets its own vocabulary, even on a reused manager
+            self.fitted = False
             embeddings = self.generate_embeddings(texts)
             
-            # Add embeddings to chunks
+            # Chunks reference their row in embedding_matrix rather than
+            # carrying a copy of the vector
+            self.build_index(embeddings)
             for i, chunk in enumerate(chunks):
-                chunk['embedding'] = embeddings[i].tolist()  # Convert to list for JSON serialization
+                chunk['embedding_idx'] = i
             
             return chunks
             
@@ -1,9 +1,163 @@
-import os
+import atexit
+import copy
+import functools
 import logging
-from typing import List, Dict, Any, Optional
-from neo4j import GraphDatabase
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import List, Dict, Any, Optional, Iterator
+from neo4j import GraphDatabase, RoutingControl, READ_ACCESS
 from datetime import datetime
 import json
+import re
+from config.neo4j_config import Neo4jConfig
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Process-wide driver shared by every GraphManager; it owns the connection pool
+_driver = None
+_driver_lock = threading.Lock()
+
+def _get_driver():
+    """Return the shared Neo4j driver, creating it on first use."""
+    global _driver
+    if _driver is not None:
+        return _driver
+
+    with _driver_lock:
+        if _driver is None:
+            config = Neo4jConfig.from_env()
+            driver = GraphDatabase.driver(
+                config.uri,
+                auth=(config.username, config.password),
+                max_connection_pool_size=config.max_connection_pool_size,
+                connection_acquisition_timeout=config.connection_acquisition_timeout,
+                max_connection_lifetime=config.max_connection_lifetime,
+                connection_timeout=config.connection_timeout
+            )
+            try:
+                driver.verify_connectivity()
+            except Exception:
+                # Not cached, so a later GraphManager retries the connection
+                driver.close()
+                raise
+            atexit.register(driver.close)
+            _driver = driver
+
+    return _driver
+
+# Read-query results shared by every GraphManager: (method, args) -> (expiry, result)
+READ_CACHE_TTL = 60  # seconds
+READ_CACHE_SIZE = 512
+_read_cache: OrderedDict = OrderedDict()
+_read_cache_lock = threading.RLock()
+_read_cache_stats = {'hits': 0, 'misses': 0, 'generation': 0}
+
+def _cached_read(method):
+    """Cache a read method's result until its TTL expires or the graph is written."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.driver:
+            return method(self, *args, **kwargs)
+
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            # Unhashable arguments (e.g. a list of names) can't be cached
+            return method(self, *args, **kwargs)
+
+        with _read_cache_lock:
+            entry = _read_cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                _read_cache.move_to_end(key)
+                _read_cache_stats['hits'] += 1
+                return copy.deepcopy(entry[1])
+            _read_cache_stats['misses'] += 1
+            generation = _read_cache_stats['generation']
+
+        result = method(self, *args, **kwargs)
+
+        with _read_cache_lock:
+            # A write that landed while the query ran makes this result stale
+            if generation == _read_cache_stats['generation']:
+                _read_cache[key] = (time.monotonic() + READ_CACHE_TTL, result)
+                _read_cache.move_to_end(key)
+                while len(_read_cache) > READ_CACHE_SIZE:
+                    _read_cache.popitem(last=False)
+
+        return copy.deepcopy(result)
+    return wrapper
+
+def _invalidate_read_cache():
+    """Drop all cached read results after the graph changes."""
+    with _read_cache_lock:
+        _read_cache.clear()
+        _read_cache_stats['generation'] += 1
+
+# Characters and operators with special meaning in Lucene query syntax
+_LUCENE_SPECIAL_RE = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+_LUCENE_OPERATOR_RE = re.compile(r'\b(AND|OR|NOT)\b')
+
+# Set by initialize_database when the server has the APOC plugin
+_apoc_available = False
+
+# Chunks committed per server-side batch when loading through APOC
+APOC_BATCH_SIZE = 500
+
+# Chunks removed per inner transaction when deleting a document
+DELETE_BATCH_SIZE = 5000
+
+# ORDER BY clauses a document page may be sorted by; never interpolate user input
+DOCUMENT_SORT_ORDERS = {
+    'upload_date': 'd.upload_date DESC',
+    'name': 'd.name ASC'
+}
+
+# Creates one chunk (bound to `chunk`) and links it to document `d`
+_CREATE_CHUNK_CYPHER = """
+        CREATE (c:Chunk {
+            chunk_id: chunk.chunk_id,
+            content: chunk.content,
+            page_number: chunk.page_number,
+            paragraph_numbers: chunk.paragraph_numbers,
+            word_count: chunk.word_count,
+            char_count: chunk.char_count,
+            chunk_type: chunk.chunk_type,
+            table_id: chunk.table_id
+        })
+        CREATE (d)-[:CONTAINS]->(c)
+"""
+
+class LazyMetadata(Mapping):
+    """Legacy JSON-string document metadata, decoded on first access."""
+
+    def __init__(self, raw: Optional[str]):
+        self._raw = raw
+        self._data = None
+
+    def _decoded(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = _loads(self._raw) if self._raw else {}
+            self._raw = None
+        return self._data
+
+    def __getitem__(self, key):
+        return self._decoded()[key]
+
+    def __iter__(self):
+        return iter(self._decoded())
+
+    def __len__(self):
+        return len(self._decoded())
+
+    def __repr__(self):
+        return repr(self._decoded())
 
 class GraphManager:
     """Manages Neo4j database operations for the clinical document converter."""
@@ -11,27 +165,38 @@ class GraphManager:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.driver = None
+        self.database = Neo4jConfig.from_env().database
         self.connect()
 
     def connect(self):
         """Establish connection to Neo4j database."""
         try:
-            # Use environment variables for Neo4j connection
-            uri = os.getenv('NEO4J_URI', 'bolt://localhost:7687')
-            username = os.getenv('NEO4J_USERNAME', 'neo4j')
-            password = os.getenv('NEO4J_PASSWORD', 'password')
-
-            self.driver = GraphDatabase.driver(uri, auth=(username, password))
-            self.driver.verify_connectivity()
+            self.driver = _get_driver()
             self.logger.info("Connected to Neo4j database")
         except Exception as e:
             self.logger.warning(f"Neo4j not available: {str(e)}")
             self.driver = None  # Set to None to enable mock mode
 
     def close(self):
-        """Close Neo4j connection."""
-        if self.driver:
-            self.driver.close()
+        """Release this manager's handle; the shared driver is closed at exit."""
+        self.driver = None
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counts, size and generation of the shared read-query cache."""
+        with _read_cache_lock:
+            return {
+                'hits': _read_cache_stats['hits'],
+                'misses': _read_cache_stats['misses'],
+                # Bumped by every write, so callers can key derived caches on it
+                'generation': _read_cache_stats['generation'],
+                'size': len(_read_cache),
+                'max_size': READ_CACHE_SIZE,
+                'ttl_seconds': READ_CACHE_TTL
+            }
+
+    def clear_cache(self):
+        """Drop cached read results so the next reads query Neo4j."""
+        _invalidate_read_cache()
 
     def initialize_database(self):
         """Initialize database with constraints and indexes."""
@@ -39,32 +204,59 @@ class GraphManager:
             self.logger.info("Using mock database mode - Neo4j not available")
             return
 
-        with self.driver.session() as session:
-            # Create constraints
-            constraints = [
-                "CREATE CONSTRAINT document_name IF NOT EXISTS FOR (d:Document) REQUIRE d.name IS UNIQUE",
-                "CREATE CONSTRAINT chunk_id IF NOT EXISTS FOR (c:Chunk) REQUIRE c.chunk_id IS UNIQUE",
-                "CREATE CONSTRAINT upload_id IF NOT EXISTS FOR (u:Upload) REQUIRE u.upload_id IS UNIQUE"
-            ]
+        # Create constraints
+        constraints = [
+            "CREATE CONSTRAINT document_name IF NOT EXISTS FOR (d:Document) REQUIRE d.name IS UNIQUE",
+            "CREATE CONSTRAINT chunk_id IF NOT EXISTS FOR (c:Chunk) REQUIRE c.chunk_id IS UNIQUE",
+            "CREATE CONSTRAINT upload_id IF NOT EXISTS FOR (u:Upload) REQUIRE u.upload_id IS UNIQUE"
+        ]
+
+        for constraint in constraints:
+            try:
+                self.driver.execute_query(constraint, database_=self.database)
+            except Exception as e:
+                self.logger.warning(f"Constraint creation failed: {str(e)}")
+
+        # Create indexes
+        indexes = [
+            "CREATE INDEX chunk_page_idx IF NOT EXISTS FOR (c:Chunk) ON (c.page_number)",
+            "CREATE INDEX document_upload_date_idx IF NOT EXISTS FOR (d:Document) ON (d.upload_date)",
+            "CREATE INDEX document_file_hash_idx IF NOT EXISTS FOR (d:Document) ON (d.file_hash)",
+            # Content search goes through a full-text index; CONTAINS cannot use a range index
+            "DROP INDEX chunk_content_idx IF EXISTS",
+            "CREATE FULLTEXT INDEX chunk_content_fts IF NOT EXISTS FOR (c:Chunk) ON EACH [c.content]"
+        ]
+
+        for index in indexes:
+            try:
+                self.driver.execute_query(index, database_=self.database)
+            except Exception as e:
+                self.logger.warning(f"Index creation failed: {str(e)}")
+
+        # Backfill the denormalized counters on documents saved before they existed
+        try:
+            self.driver.execute_query("""
+                MATCH (d:Document) WHERE d.word_count IS NULL OR d.triple_count IS NULL
+                SET d.word_count = COALESCE(d.word_count,
+                        COLLECT { MATCH (d)-[:CONTAINS]->(c:Chunk) RETURN sum(c.word_count) }[0]),
+                    d.triple_count = COALESCE(d.triple_count,
+                        COUNT { (d)-[:CONTAINS]->(:Chunk)-[:EXTRACTED_FROM]->(:Triple) })
+            """, database_=self.database)
+        except Exception as e:
+            self.logger.warning(f"Counter backfill failed: {str(e)}")
 
-            for constraint in constraints:
-                try:
-                    session.run(constraint)
-                except Exception as e:
-                    self.logger.warning(f"Constraint creation failed: {str(e)}")
-
-            # Create indexes
-            indexes = [
-                "CREATE INDEX chunk_page_idx IF NOT EXISTS FOR (c:Chunk) ON (c.page_number)",
-                "CREATE INDEX document_upload_date_idx IF NOT EXISTS FOR (d:Document) ON (d.upload_date)",
-                "CREATE INDEX chunk_content_idx IF NOT EXISTS FOR (c:Chunk) ON (c.content)"
-            ]
+        # The backfill can change statistics already served from the cache
+        _invalidate_read_cache()
 
-            for index in indexes:
-                try:
-                    session.run(index)
-                except Exception as e:
-                    self.logger.warning(f"Index creation failed: {str(e)}")
+        # Detect APOC once so bulk loads can use server-side batching
+        global _apoc_available
+        try:
+            self.driver.execute_query("RETURN apoc.version() AS version",
+                                      database_=self.database, routing_=RoutingControl.READ)
+            _apoc_available = True
+        except Exception:
+            _apoc_available = False
+        self.logger.info(f"APOC available: {_apoc_available}")
 
     def save_document(self, document_data: Dict[str, Any], chunks: List[Dict[str, Any]]) -> str:
         """Save document and chunks to Neo4j."""
@@ -72,124 +264,270 @@ class GraphManager:
             self.logger.info("Mock mode: Document would be saved to Neo4j")
             return document_data['name']
 
-        with self.driver.session() as session:
-            # Create document node
-            document_query = """
-            CREATE (d:Document {
-                name: $name,
-                upload_date: $upload_date,
-                file_path: $file_path,
-                total_chunks: $total_chunks,
-                processing_status: $processing_status,
-                file_hash: $file_hash,
-                metadata: $metadata
-            })
-            RETURN d.name as name
-            """
-
-            doc_result = session.run(document_query, {
-                'name': document_data['name'],
-                'upload_date': datetime.now().isoformat(),
-                'file_path': document_data.get('file_path', ''),
-                'total_chunks': len(chunks),
-                'processing_status': 'processing',
-                'file_hash': document_data.get('file_hash', ''),
-                'metadata': json.dumps(document_data.get('metadata', {}))
-            })
-
-            document_name = doc_result.single()['name']
-
-            # Create chunks and relationships
-            for chunk in chunks:
-                chunk_query = """
-                MATCH (d:Document {name: $document_name})
-                CREATE (c:Chunk {
-                    chunk_id: $chunk_id,
-                    content: $content,
-                    page_number: $page_number,
-                    paragraph_numbers: $paragraph_numbers,
-                    word_count: $word_count,
-                    char_count: $char_count,
-                    chunk_type: $chunk_type,
-                    table_id: $table_id
-                })
-                CREATE (d)-[:CONTAINS]->(c)
-                """
-
-                session.run(chunk_query, {
-                    'document_name': document_name,
-                    'chunk_id': chunk['chunk_id'],
-                    'content': chunk['content'],
-                    'page_number': chunk['page_number'],
-                    'paragraph_numbers': chunk['paragraph_numbers'],
-                    'word_count': chunk['word_count'],
-                    'char_count': chunk['char_count'],
-                    'chunk_type': chunk['chunk_type'],
-                    'table_id': chunk.get('table_id', '')
-                })
-
-            # Update document status
-            session.run(
-                "MATCH (d:Document {name: $name}) SET d.processing_status = 'completed'",
-                {'name': document_name}
-            )
+        document_params = {
+            'name': document_data['name'],
+            'upload_date': datetime.now().isoformat(),
+            'file_path': document_data.get('file_path', ''),
+            'total_chunks': len(chunks),
+            'word_count': sum(chunk['word_count'] for chunk in chunks),
+            'processing_status': 'processing',
+            'file_hash': document_data.get('file_hash', ''),
+            'legacy_file_hash': document_data.get('legacy_file_hash', ''),
+            'metadata': self._metadata_properties(document_data.get('metadata', {}))
+        }
+        chunks_param = [
+            {
+                'chunk_id': chunk['chunk_id'],
+                'content': chunk['content'],
+                'page_number': chunk['page_number'],
+                'paragraph_numbers': chunk['paragraph_numbers'],
+                'word_count': chunk['word_count'],
+                'char_count': chunk['char_count'],
+                'chunk_type': chunk['chunk_type'],
+                'table_id': chunk.get('table_id', '')
+            }
+            for chunk in chunks
+        ]
 
-            return document_name
+        with self.driver.session(database=self.database) as session:
+            if _apoc_available:
+                # APOC streams the chunks and commits them in server-sized batches
+                document_name = session.execute_write(self._create_document_node, document_params)
+                try:
+                    self._load_chunks_apoc(session, document_name, chunks_param)
+                    session.execute_write(self._mark_document_completed, document_name)
+                except Exception:
+                    # The document node is already committed; do not leave it
+                    # half-loaded, holding its name and skewing the statistics
+                    self._discard_partial_document(document_name)
+                    raise
+            else:
+                document_name = session.execute_write(self._write_document, document_params, chunks_param)
+
+        _invalidate_read_cache()
+        return document_name
+
+    @staticmethod
+    def _write_document(tx, document_params: Dict[str, Any], chunks_param: List[Dict[str, Any]]) -> str:
+        """Create the document, its chunks and relationships in one transaction."""
+        document_name = GraphManager._create_document_node(tx, document_params)
+
+        # Create all chunks and relationships in a single round-trip
+        chunk_query = """
+        MATCH (d:Document {name: $document_name})
+        UNWIND $chunks AS chunk
+        """ + _CREATE_CHUNK_CYPHER
+
+        tx.run(chunk_query, {'document_name': document_name, 'chunks': chunks_param}).consume()
+
+        GraphManager._mark_document_completed(tx, document_name)
+        return document_name
+
+    @staticmethod
+    def _create_document_node(tx, document_params: Dict[str, Any]) -> str:
+        """Create the document node in processing state."""
+        # Chunk ids derive from the file hash, so the same bytes under another
+        # name would collide on chunk_id; refuse them before anything is written.
+        # Documents stored before the switch to BLAKE2b carry an MD5 hash.
+        file_hashes = [h for h in (document_params['file_hash'], document_params['legacy_file_hash']) if h]
+        if file_hashes:
+            existing = tx.run(
+                "MATCH (d:Document) WHERE d.file_hash IN $file_hashes RETURN d.name AS name LIMIT 1",
+                {'file_hashes': file_hashes}
+            ).single()
+            if existing:
+                raise ValueError(f"This file was already uploaded as '{existing['name']}'")
+
+        document_query = """
+        CREATE (d:Document {
+            name: $name,
+            upload_date: $upload_date,
+            file_path: $file_path,
+            total_chunks: $total_chunks,
+            word_count: $word_count,
+            triple_count: 0,
+            processing_status: $processing_status,
+            file_hash: $file_hash
+        })
+        CREATE (d)-[:HAS_META]->(:Metadata $metadata)
+        RETURN d.name as name
+        """
+
+        return tx.run(document_query, document_params).single()['name']
+
+    @staticmethod
+    def _metadata_properties(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Coerce metadata values to types Neo4j can store as node properties."""
+        properties = {}
+        for key, value in metadata.items():
+            if value is None:
+                continue
+            if not isinstance(value, (str, int, float, bool)):
+                value = str(value)
+            properties[key] = value
+        return properties
+
+    @staticmethod
+    def _mark_document_completed(tx, document_name: str):
+        """Update document status once all chunks are stored."""
+        tx.run(
+            "MATCH (d:Document {name: $name}) SET d.processing_status = 'completed'",
+            {'name': document_name}
+        ).consume()
+
+    def _load_chunks_apoc(self, session, document_name: str, chunks_param: List[Dict[str, Any]]):
+        """Bulk-load chunks with apoc.periodic.iterate."""
+        query = """
+        CALL apoc.periodic.iterate(
+            "UNWIND $chunks AS chunk RETURN chunk",
+            $action,
+            {batchSize: $batch_size, parallel: false, params: {chunks: $chunks, name: $name}}
+        )
+        YIELD failedBatches, errorMessages
+        RETURN failedBatches, errorMessages
+        """
+
+        record = session.run(query, {
+            'chunks': chunks_param,
+            'name': document_name,
+            'action': "MATCH (d:Document {name: $name})" + _CREATE_CHUNK_CYPHER,
+            'batch_size': APOC_BATCH_SIZE
+        }).single()
+
+        # periodic.iterate reports batch failures instead of raising
+        if record['failedBatches']:
+            raise RuntimeError(f"APOC chunk load failed: {record['errorMessages']}")
+
+    def _discard_partial_document(self, document_name: str):
+        """Remove a document whose chunk load failed, along with any chunks already committed."""
+        try:
+            self.delete_document(document_name)
+        except Exception as e:
+            self.logger.error(f"Error removing partially saved document {document_name}: {str(e)}")
+        finally:
+            _invalidate_read_cache()
 
-    def get_all_documents(self) -> List[Dict[str, Any]]:
-        """Retrieve all documents from database."""
+    def save_triples(self, document_name: str, chunk_id: Any, triples: List[Dict[str, Any]]) -> int:
+        """Save triples extracted from a chunk and bump the document's triple count."""
         if not self.driver:
-            return [
+            self.logger.info("Mock mode: Triples would be saved to Neo4j")
+            return len(triples)
+
+        if not triples:
+            return 0
+
+        query = """
+        MATCH (d:Document {name: $document_name})-[:CONTAINS]->(c:Chunk {chunk_id: $chunk_id})
+        UNWIND $triples AS triple
+        CREATE (c)-[:EXTRACTED_FROM]->(t:Triple {
+            subject: triple.subject,
+            predicate: triple.predicate,
+            object: triple.object,
+            confidence: triple.confidence
+        })
+        WITH d, count(t) AS created
+        SET d.triple_count = COALESCE(d.triple_count, 0) + created
+        RETURN created
+        """
+
+        records, _, _ = self.driver.execute_query(query, {
+            'document_name': document_name,
+            'chunk_id': chunk_id,
+            'triples': [
                 {
-                    'name': 'Sample Clinical Study.pdf',
-                    'upload_date': '2024-01-15T10:30:00',
-                    'status': 'completed',
-                    'total_chunks': 25,
-                    'actual_chunks': 25,
-                    'metadata': {'num_pages': 12}
+                    'subject': triple['subject'],
+                    'predicate': triple['predicate'],
+                    'object': triple['object'],
+                    'confidence': float(triple.get('confidence', 0.5))
                 }
+                for triple in triples
             ]
+        }, database_=self.database)
 
-        with self.driver.session() as session:
-            query = """
-            MATCH (d:Document)
-            OPTIONAL MATCH (d)-[:CONTAINS]->(c:Chunk)
-            RETURN d.name as name, d.upload_date as upload_date, 
-                   d.processing_status as status, d.total_chunks as total_chunks,
-                   d.metadata as metadata, count(c) as actual_chunks
-            ORDER BY d.upload_date DESC
-            """
-
-            result = session.run(query)
-            documents = []
-
-            for record in result:
-                metadata = json.loads(record['metadata']) if record['metadata'] else {}
-                documents.append({
-                    'name': record['name'],
-                    'upload_date': record['upload_date'],
-                    'status': record['status'],
-                    'total_chunks': record['total_chunks'],
-                    'actual_chunks': record['actual_chunks'],
-                    'metadata': metadata
-                })
-
-            return documents
+        _invalidate_read_cache()
+        return records[0]['created'] if records else 0
+
+    @_cached_read
+    def get_all_documents(self) -> List[Dict[str, Any]]:
+        """Retrieve all documents from database."""
+        return list(self.iter_all_documents())
+
+    def iter_all_documents(self) -> Iterator[Dict[str, Any]]:
+        """Stream all documents from database, newest first."""
+        if not self.driver:
+            yield {
+                'name': 'Sample Clinical Study.pdf',
+                'upload_date': '2024-01-15T10:30:00',
+                'status': 'completed',
+                'total_chunks': 25,
+                'actual_chunks': 25,
+                'metadata': {'num_pages': 12}
+            }
+            return
+
+        query = """
+        MATCH (d:Document)
+        OPTIONAL MATCH (d)-[:HAS_META]->(m:Metadata)
+        OPTIONAL MATCH (d)-[:CONTAINS]->(c:Chunk)
+        RETURN d.name as name, d.upload_date as upload_date, 
+               d.processing_status as status, d.total_chunks as total_chunks,
+               properties(m) as metadata, d.metadata as legacy_metadata,
+               count(c) as actual_chunks
+        ORDER BY d.upload_date DESC
+        """
+
+        # Records are pulled from the server as the caller iterates
+        with self.driver.session(database=self.database, default_access_mode=READ_ACCESS) as session:
+            for record in session.run(query):
+                yield self._document_row(record)
+
+    @staticmethod
+    def _document_row(record: Mapping) -> Dict[str, Any]:
+        """Build a document listing entry from a query row."""
+        return {
+            'name': record['name'],
+            'upload_date': record['upload_date'],
+            'status': record['status'],
+            'total_chunks': record['total_chunks'],
+            'actual_chunks': record['actual_chunks'],
+            # Documents saved before the Metadata node carry a JSON string
+            'metadata': record['metadata'] if record['metadata'] is not None
+                        else LazyMetadata(record['legacy_metadata'])
+        }
 
     def delete_document(self, document_name: str) -> bool:
         """Delete document and all related nodes."""
-        with self.driver.session() as session:
-            query = """
-            MATCH (d:Document {name: $name})
-            OPTIONAL MATCH (d)-[:CONTAINS]->(c:Chunk)
+        if not self.driver:
+            self.logger.info("Mock mode: Document would be deleted from Neo4j")
+            return False
+
+        # Chunks and their extracted nodes go in bounded batches so large
+        # documents never have to fit in a single transaction
+        chunks_query = """
+        MATCH (:Document {name: $name})-[:CONTAINS]->(c:Chunk)
+        CALL {
+            WITH c
             OPTIONAL MATCH (c)-[:EXTRACTED_FROM]->(t:Triple)
             OPTIONAL MATCH (c)-[:REFERENCES]->(cite:Citation)
-            DETACH DELETE d, c, t, cite
-            """
-
-            result = session.run(query, {'name': document_name})
-            return result.consume().counters.nodes_deleted > 0
-
+            DETACH DELETE c, t, cite
+        } IN TRANSACTIONS OF $batch_size ROWS
+        """
+        document_query = """
+        MATCH (d:Document {name: $name})
+        OPTIONAL MATCH (d)-[:HAS_META]->(m:Metadata)
+        DETACH DELETE d, m
+        """
+
+        # CALL ... IN TRANSACTIONS needs an auto-commit transaction
+        with self.driver.session(database=self.database) as session:
+            session.run(chunks_query, {'name': document_name, 'batch_size': DELETE_BATCH_SIZE}).consume()
+            summary = session.run(document_query, {'name': document_name}).consume()
+            deleted = summary.counters.nodes_deleted > 0
+
+        _invalidate_read_cache()
+        return deleted
+
+    @_cached_read
     def get_statistics(self) -> Dict[str, Any]:
         """Get database statistics."""
         if not self.driver:
@@ -200,64 +538,126 @@ class GraphManager:
                 'total_words': 5000
             }
 
-        with self.driver.session() as session:
-            stats_query = """
-            MATCH (d:Document)
-            OPTIONAL MATCH (d)-[:CONTAINS]->(c:Chunk)
-            OPTIONAL MATCH (c)-[:EXTRACTED_FROM]->(t:Triple)
-            RETURN count(DISTINCT d) as total_documents,
-                   count(c) as total_chunks,
-                   count(t) as total_triples,
-                   sum(c.word_count) as total_words
-            """
-
-            result = session.run(stats_query)
-            record = result.single()
-
-            return {
-                'total_documents': record['total_documents'] or 0,
-                'total_chunks': record['total_chunks'] or 0,
-                'total_triples': record['total_triples'] or 0,
-                'total_words': record['total_words'] or 0
-            }
+        # Chunk and word counters are maintained on each document. Triples are
+        # counted from the graph, as nothing in the app calls save_triples yet
+        stats_query = """
+        MATCH (d:Document)
+        WITH count(d) as total_documents,
+             sum(d.total_chunks) as total_chunks,
+             sum(d.word_count) as total_words
+        RETURN total_documents, total_chunks, total_words,
+               COUNT { (:Document)-[:CONTAINS]->(:Chunk)-[:EXTRACTED_FROM]->(:Triple) } as total_triples
+        """
+
+        records, _, _ = self.driver.execute_query(stats_query, database_=self.database,
+                                                  routing_=RoutingControl.READ)
+        record = records[0]
+
+        return {
+            'total_documents': record['total_documents'] or 0,
+            'total_chunks': record['total_chunks'] or 0,
+            'total_triples': record['total_triples'] or 0,
+            'total_words': record['total_words'] or 0
+        }
+
+    @_cached_read
+    def get_documents_page(self, offset: int = 0, limit: int = 25,
+                           sort: str = 'upload_date') -> List[Dict[str, Any]]:
+        """Get one page of the document listing, paginated on the server."""
+        if sort not in DOCUMENT_SORT_ORDERS:
+            raise ValueError(f"Unsupported document sort: {sort}")
 
-    def search_chunks(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Search chunks by content."""
         if not self.driver:
-            return [
-                {
-                    'document_name': 'Sample Clinical Study.pdf',
-                    'chunk_id': 'chunk_001',
-                    'content': f'Mock search result for query: {query}. This would contain relevant clinical study information.',
-                    'page_number': 1,
-                    'chunk_type': 'paragraph'
-                }
-            ]
+            return list(self.iter_all_documents())[offset:offset + limit]
+
+        # Only the documents on the page are joined to their metadata and chunks
+        order_by = DOCUMENT_SORT_ORDERS[sort]
+        page_query = f"""
+        MATCH (d:Document)
+        WITH d ORDER BY {order_by} SKIP $offset LIMIT $limit
+        OPTIONAL MATCH (d)-[:HAS_META]->(m:Metadata)
+        RETURN d.name as name, d.upload_date as upload_date,
+               d.processing_status as status, d.total_chunks as total_chunks,
+               properties(m) as metadata, d.metadata as legacy_metadata,
+               COUNT {{ (d)-[:CONTAINS]->(:Chunk) }} as actual_chunks
+        ORDER BY {order_by}
+        """
+
+        records, _, _ = self.driver.execute_query(page_query, {'offset': offset, 'limit': limit},
+                                                  database_=self.database,
+                                                  routing_=RoutingControl.READ)
+        return [self._document_row(record) for record in records]
+
+    @_cached_read
+    def get_document_names(self, prefix: str = '', limit: int = 50) -> List[str]:
+        """Get document names starting with prefix, in name order."""
+        if not self.driver:
+            names = sorted(doc['name'] for doc in self.iter_all_documents())
+            return [name for name in names if name.startswith(prefix)][:limit]
+
+        # STARTS WITH is served by the index behind the document_name constraint
+        names_query = """
+        MATCH (d:Document)
+        WHERE d.name STARTS WITH $prefix
+        RETURN d.name as name
+        ORDER BY d.name
+        LIMIT $limit
+        """
+
+        records, _, _ = self.driver.execute_query(names_query, {'prefix': prefix, 'limit': limit},
+                                                  database_=self.database,
+                                                  routing_=RoutingControl.READ)
+        return [record['name'] for record in records]
+
+    @_cached_read
+    def search_chunks(self, query: str, limit: int = 10,
+                      content_chars: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Search chunks by content."""
+        return list(self.iter_search_chunks(query, limit, content_chars))
 
-        with self.driver.session() as session:
-            search_query = """
-            MATCH (d:Document)-[:CONTAINS]->(c:Chunk)
-            WHERE c.content CONTAINS $query
-            RETURN d.name as document_name, c.chunk_id as chunk_id,
-                   c.content as content, c.page_number as page_number,
-                   c.chunk_type as chunk_type
-            ORDER BY c.page_number
-            LIMIT $limit
-            """
+    def iter_search_chunks(self, query: str, limit: int = 10,
+                           content_chars: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Stream chunk search results, best match first."""
+        if not self.driver:
+            yield {
+                'document_name': 'Sample Clinical Study.pdf',
+                'chunk_id': 'chunk_001',
+                'content': f'Mock search result for query: {query}. This would contain relevant clinical study information.',
+                'page_number': 1,
+                'chunk_type': 'paragraph'
+            }
+            return
 
-            result = session.run(search_query, {'query': query, 'limit': limit})
-            chunks = []
+        # User text is matched literally, not as Lucene query syntax
+        search_terms = _LUCENE_SPECIAL_RE.sub(r'\\\1', query.strip())
+        search_terms = _LUCENE_OPERATOR_RE.sub(lambda m: m.group().lower(), search_terms)
+        if not search_terms:
+            return
 
-            for record in result:
-                chunks.append({
+        # Optionally cut content server-side, for views that only show its start
+        search_query = """
+        CALL db.index.fulltext.queryNodes('chunk_content_fts', $query) YIELD node AS c, score
+        MATCH (d:Document)-[:CONTAINS]->(c)
+        RETURN d.name as document_name, c.chunk_id as chunk_id,
+               CASE WHEN $content_chars IS NULL THEN c.content
+                    ELSE substring(c.content, 0, $content_chars) END as content,
+               c.page_number as page_number,
+               c.chunk_type as chunk_type
+        ORDER BY score DESC
+        LIMIT $limit
+        """
+
+        # Records are pulled from the server as the caller iterates
+        with self.driver.session(database=self.database, default_access_mode=READ_ACCESS) as session:
+            params = {'query': search_terms, 'limit': limit, 'content_chars': content_chars}
+            for record in session.run(search_query, params):
+                yield {
                     'document_name': record['document_name'],
                     'chunk_id': record['chunk_id'],
                     'content': record['content'],
                     'page_number': record['page_number'],
                     'chunk_type': record['chunk_type']
-                })
-
-            return chunks
+                }
 
     def save_upload_metadata(self, upload_data: Dict[str, Any]) -> str:
         """Save upload metadata."""
@@ -265,33 +665,34 @@ class GraphManager:
             self.logger.info("Mock mode: Upload metadata would be saved")
             return upload_data['upload_id']
 
-        with self.driver.session() as session:
-            query = """
-            CREATE (u:Upload {
-                upload_id: $upload_id,
-                document_name: $document_name,
-                upload_timestamp: $upload_timestamp,
-                total_chunks: $total_chunks,
-                tokens_used: $tokens_used,
-                status: $status,
-                processing_cost: $processing_cost
-            })
-            RETURN u.upload_id as upload_id
-            """
-
-            result = session.run(query, {
-                'upload_id': upload_data['upload_id'],
-                'document_name': upload_data['document_name'],
-                'upload_timestamp': datetime.now().isoformat(),
-                'total_chunks': upload_data['total_chunks'],
-                'tokens_used': upload_data.get('tokens_used', 0),
-                'status': upload_data['status'],
-                'processing_cost': upload_data.get('processing_cost', 0.0)
-            })
-
-            return result.single()['upload_id']
-
-    def get_document_chunks(self, document_name: str, limit: int = 5) -> List[Dict[str, Any]]:
+        query = """
+        CREATE (u:Upload {
+            upload_id: $upload_id,
+            document_name: $document_name,
+            upload_timestamp: $upload_timestamp,
+            total_chunks: $total_chunks,
+            tokens_used: $tokens_used,
+            status: $status,
+            processing_cost: $processing_cost
+        })
+        RETURN u.upload_id as upload_id
+        """
+
+        records, _, _ = self.driver.execute_query(query, {
+            'upload_id': upload_data['upload_id'],
+            'document_name': upload_data['document_name'],
+            'upload_timestamp': datetime.now().isoformat(),
+            'total_chunks': upload_data['total_chunks'],
+            'tokens_used': upload_data.get('tokens_used', 0),
+            'status': upload_data['status'],
+            'processing_cost': upload_data.get('processing_cost', 0.0)
+        }, database_=self.database)
+
+        return records[0]['upload_id']
+
+    @_cached_read
+    def get_document_chunks(self, document_name: str, limit: int = 5,
+                            content_chars: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get chunks for a specific document."""
         if not self.driver:
             return [
@@ -305,28 +706,64 @@ class GraphManager:
                 }
             ]
 
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (d:Document {name: $document_name})-[:CONTAINS]->(c:Chunk)
-                RETURN c.chunk_id as chunk_id,
-                       c.content as content,
-                       c.page_number as page_number,
-                       c.chunk_type as chunk_type,
-                       c.word_count as word_count,
-                       c.char_count as char_count
-                ORDER BY c.page_number
-                LIMIT $limit
-            """, document_name=document_name, limit=limit)
+        records, _, _ = self.driver.execute_query("""
+            MATCH (d:Document {name: $document_name})-[:CONTAINS]->(c:Chunk)
+            RETURN c.chunk_id as chunk_id,
+                   CASE WHEN $content_chars IS NULL THEN c.content
+                        ELSE substring(c.content, 0, $content_chars) END as content,
+                   c.page_number as page_number,
+                   c.chunk_type as chunk_type,
+                   c.word_count as word_count,
+                   c.char_count as char_count
+            ORDER BY c.page_number
+            LIMIT $limit
+        """, {'document_name': document_name, 'limit': limit, 'content_chars': content_chars},
+            database_=self.database, routing_=RoutingControl.READ)
+
+        chunks = []
+        for record in records:
+            chunks.append({
+                'chunk_id': record['chunk_id'],
+                'content': record['content'],
+                'page_number': record['page_number'],
+                'chunk_type': record['chunk_type'],
+                'word_count': record['word_count'],
+                'char_count': record['char_count']
+            })
 
-            chunks = []
-            for record in result:
-                chunks.append({
-                    'chunk_id': record['chunk_id'],
-                    'content': record['content'],
-                    'page_number': record['page_number'],
-                    'chunk_type': record['chunk_type'],
-                    'word_count': record['word_count'],
-                    'char_count': record['char_count']
-                })
+        return chunks
 
-            return chunks
\ No newline at end of file
+    @_cached_read
+    def get_document_previews(self, document_names: List[str], limit: int = 3,
+                              content_chars: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Get the first chunks of many documents in one query, keyed by document name."""
+        if not self.driver:
+            return {name: self.get_document_chunks(name, limit, content_chars) for name in document_names}
+
+        # Optionally cut content server-side, since previews only show its start
+        records, _, _ = self.driver.execute_query("""
+            UNWIND $document_names AS document_name
+            CALL {
+                WITH document_name
+                MATCH (:Document {name: document_name})-[:CONTAINS]->(c:Chunk)
+                RETURN c
+                ORDER BY c.page_number
+                LIMIT $limit
+            }
+            RETURN document_name, collect({
+                chunk_id: c.chunk_id,
+                content: CASE WHEN $content_chars IS NULL THEN c.content
+                              ELSE substring(c.content, 0, $content_chars) END,
+                page_number: c.page_number,
+                chunk_type: c.chunk_type,
+                word_count: c.word_count,
+                char_count: c.char_count
+            }) as chunks
+        """, {'document_names': list(document_names), 'limit': limit, 'content_chars': content_chars},
+            database_=self.database, routing_=RoutingControl.READ)
+
+        previews = {name: [] for name in document_names}
+        for record in records:
+            previews[record['document_name']] = record['chunks']
+
+        return previews
@@ -0,0 +1,70 @@
+import hashlib
+import logging
+import os
+import json
+import tempfile
+from typing import Optional
+
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+# Where LLM responses are persisted when no directory is given
+DEFAULT_CACHE_DIR = os.path.join('data', 'llm_cache')
+
+def cache_key(*parts: str) -> str:
+    """Hash the parts of a request into a content-addressable key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = part.encode('utf-8')
+        # Length-prefix each field so ("ab", "c") and ("a", "bc") differ
+        digest.update(len(encoded).to_bytes(8, 'big'))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+class LLMCache:
+    """On-disk cache of LLM responses, one JSON file per request hash."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """Get the cached response for key, or None on a miss."""
+        try:
+            # Entries are read as bytes, which orjson parses without a decode step
+            with open(self._path(key), 'rb') as f:
+                return _loads(f.read())['content']
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Dropping unreadable cache entry {key}: {str(e)}")
+            self.delete(key)
+            return None
+
+    def set(self, key: str, content: str):
+        """Store a response, replacing the file atomically."""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_dumps({'content': content}))
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            self.logger.error(f"Error writing cache entry {key}: {str(e)}")
+
+    def delete(self, key: str):
+        """Remove a cached response if present."""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,80 @@
+import openai
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable
+
+# Default account budgets; override per deployment tier
+DEFAULT_RPM = 3500
+DEFAULT_TPM = 90000
+
+# Attempts per request and the base delay (seconds) of the exponential backoff
+DISPATCH_MAX_ATTEMPTS = 5
+DISPATCH_BASE_DELAY = 1.0
+
+# Failures worth retrying: rate limits, timeouts, dropped connections, 5xx
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError
+)
+
+class AsyncLLMDispatcher:
+    """Paces async LLM requests to requests- and tokens-per-minute budgets.
+
+    Each budget is a bucket that refills continuously up to one minute's
+    allowance; a request waits until both buckets can cover it. Failed
+    requests are retried with exponential backoff and jitter. The buckets are
+    plain floats touched only between awaits, so one dispatcher can serve
+    several event loops in turn.
+    """
+
+    def __init__(self, rpm: int = DEFAULT_RPM, tpm: int = DEFAULT_TPM,
+                 max_attempts: int = DISPATCH_MAX_ATTEMPTS, base_delay: float = DISPATCH_BASE_DELAY):
+        self.logger = logging.getLogger(__name__)
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self._available_requests = float(rpm)
+        self._available_tokens = float(tpm)
+        self._last_refill = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        minutes = (now - self._last_refill) / 60
+        self._last_refill = now
+        self._available_requests = min(self.rpm, self._available_requests + self.rpm * minutes)
+        self._available_tokens = min(self.tpm, self._available_tokens + self.tpm * minutes)
+
+    async def _acquire(self, tokens: int):
+        """Wait until both budgets cover one request of the given token count."""
+        # A request larger than the whole budget still has to be able to go
+        tokens = min(tokens, self.tpm)
+        while True:
+            self._refill()
+            if self._available_requests >= 1 and self._available_tokens >= tokens:
+                self._available_requests -= 1
+                self._available_tokens -= tokens
+                return
+
+            wait = max(
+                (1 - self._available_requests) * 60 / self.rpm,
+                (tokens - self._available_tokens) * 60 / self.tpm,
+                0.01
+            )
+            await asyncio.sleep(wait)
+
+    async def submit(self, tokens: int, request: Callable[[], Awaitable[Any]]) -> Any:
+        """Run request() once the budgets allow it, retrying transient failures."""
+        for attempt in range(self.max_attempts):
+            await self._acquire(tokens)
+            try:
+                return await request()
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_attempts - 1:
+                    raise
+                delay = self.base_delay * 2 ** attempt + random.uniform(0, self.base_delay)
+                self.logger.warning(f"LLM request failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
@@ -1,16 +1,271 @@
 import openai
+import httpx
+import asyncio
+import functools
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
 import json
 import re
+from pydantic import BaseModel, ValidationError
+from core.llm_cache import LLMCache, DEFAULT_CACHE_DIR, cache_key
+from core.llm_dispatcher import AsyncLLMDispatcher, DEFAULT_RPM, DEFAULT_TPM
+from utils.token_counter import TokenCounter
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Common clinical terms; chunks mentioning none of them are not sent to the LLM
+CLINICAL_TERMS = ('study', 'trial', 'patient', 'protocol', 'phase', 'treatment', 'medication')
+PROCEDURE_TERMS = frozenset({'study', 'trial', 'protocol'})
+# One pass over the text finds every term, including inside longer words
+_CLINICAL_TERM_RE = re.compile('|'.join(map(re.escape, CLINICAL_TERMS)), re.IGNORECASE)
+
+# Chunks with fewer words than this (headers, TOC lines) are not sent to the LLM
+MIN_LLM_WORDS = 30
+_WORD_RE = re.compile(r'\w+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Summaries use a small, fast model and never need more than this much input
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_MAX_INPUT_CHARS = 8000
+# Rough characters per token, used to cap summary generation
+CHARS_PER_TOKEN = 3
+
+# Retries (with exponential backoff and jitter) the OpenAI SDK applies per request
+LLM_MAX_RETRIES = 3
+
+# Connection pool for OpenAI HTTP clients, sized for concurrent extraction
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+
+# One sync client per API key, shared by every LLMProcessor so connections
+# and TLS sessions are reused across instances and Streamlit reruns
+_clients: Dict[str, openai.OpenAI] = {}
+_clients_lock = threading.Lock()
+
+def _get_client(api_key: str) -> openai.OpenAI:
+    """Get the shared OpenAI client for an API key, creating it on first use."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = openai.OpenAI(
+                api_key=api_key,
+                max_retries=LLM_MAX_RETRIES,
+                http_client=openai.DefaultHttpxClient(limits=HTTP_LIMITS)
+            )
+            _clients[api_key] = client
+        return client
+
+# Fixed instructions go in the system message so the provider can cache the
+# shared prompt prefix; the user message carries only the chunk text
+TRIPLE_SYSTEM_PROMPT = """You are an expert at extracting structured information from clinical documents.
+Extract key relationships from the clinical IRT study design text in the user message as subject-predicate-object triples.
+Focus on:
+- Medical procedures and their relationships
+- Study phases and timelines
+- Regulatory requirements
+- Investigator roles and responsibilities
+- Medications and conditions
+
+Return a JSON object with a "triples" list of objects with 'subject', 'predicate', 'object', and 'confidence' fields.
+Confidence should be a float between 0 and 1.
+
+Example format:
+{"triples": [
+    {"subject": "Phase I Study", "predicate": "includes", "object": "safety assessment", "confidence": 0.9},
+    {"subject": "Investigator", "predicate": "responsible_for", "object": "patient enrollment", "confidence": 0.8}
+]}"""
+
+BATCH_TRIPLE_SYSTEM_PROMPT = TRIPLE_SYSTEM_PROMPT + """
+
+The user message may hold several texts, each wrapped as <<<DOC i>>> ... <<<END i>>>.
+Extract triples from each text separately and return a JSON object keyed by the text index,
+mapping each index to its list of triples, e.g. {"0": [...], "1": [...]}."""
+
+# Texts packed into one request by extract_triples_batch
+TRIPLE_BATCH_SIZE = 10
+
+# Seconds between status checks while waiting on an OpenAI Batch API job
+BATCH_POLL_INTERVAL = 30
+BATCH_FAILED_STATUSES = ('failed', 'expired', 'cancelled')
+
+ENTITY_SYSTEM_PROMPT = """You are an expert at medical named entity recognition.
+Extract medical and clinical entities from the text in the user message.
+Categorize them as: PROCEDURE, MEDICATION, CONDITION, PERSON, ORGANIZATION, DATE, LOCATION
+
+Return a JSON object with an "entities" list of objects with 'entity', 'category', and 'confidence' fields."""
+
+COMBINED_SYSTEM_PROMPT = """You are an expert at extracting structured information from clinical documents.
+Extract medical and clinical entities and key relationships from the clinical IRT study design text in the user message.
+
+Entities: categorize them as PROCEDURE, MEDICATION, CONDITION, PERSON, ORGANIZATION, DATE, LOCATION,
+each with 'entity', 'category', and 'confidence' fields.
+
+Triples: subject-predicate-object relationships covering medical procedures, study phases and timelines,
+regulatory requirements, investigator roles and responsibilities, and medications and conditions,
+each with 'subject', 'predicate', 'object', and 'confidence' fields.
+
+Confidence should be a float between 0 and 1.
+
+Return a single JSON object in this format:
+{
+    "entities": [{"entity": "Phase I Study", "category": "PROCEDURE", "confidence": 0.9}],
+    "triples": [{"subject": "Phase I Study", "predicate": "includes", "object": "safety assessment", "confidence": 0.9}]
+}"""
+
+class Triple(BaseModel):
+    """A subject-predicate-object relationship extracted by the LLM."""
+    subject: str
+    predicate: str
+    object: str
+    confidence: float = 0.5
+
+class TripleList(BaseModel):
+    """The triples response the extraction prompts ask for."""
+    triples: List[Triple]
+
+# Follow-up attempts, with the validation error fed back, for responses that fail TripleList
+TRIPLE_VALIDATION_RETRIES = 2
+TRIPLE_RETRY_BACKOFF = 1.0  # seconds, multiplied by the attempt number
+
+# JSON schemas for structured outputs, mirroring the formats the prompts describe
+_TRIPLE_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "subject": {"type": "string"},
+        "predicate": {"type": "string"},
+        "object": {"type": "string"},
+        "confidence": {"type": "number"}
+    },
+    "required": ["subject", "predicate", "object", "confidence"],
+    "additionalProperties": False
+}
+
+_ENTITY_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "entity": {"type": "string"},
+        "category": {
+            "type": "string",
+            "enum": ["PROCEDURE", "MEDICATION", "CONDITION", "PERSON", "ORGANIZATION", "DATE", "LOCATION"]
+        },
+        "confidence": {"type": "number"}
+    },
+    "required": ["entity", "category", "confidence"],
+    "additionalProperties": False
+}
+
+def _json_schema_format(name: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a strict json_schema response_format for an object of lists."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties),
+                "additionalProperties": False
+            }
+        }
+    }
+
+TRIPLE_RESPONSE_FORMAT = _json_schema_format(
+    "triples", {"triples": {"type": "array", "items": _TRIPLE_ITEM_SCHEMA}}
+)
+ENTITY_RESPONSE_FORMAT = _json_schema_format(
+    "entities", {"entities": {"type": "array", "items": _ENTITY_ITEM_SCHEMA}}
+)
+COMBINED_RESPONSE_FORMAT = _json_schema_format(
+    "extraction", {
+        "entities": {"type": "array", "items": _ENTITY_ITEM_SCHEMA},
+        "triples": {"type": "array", "items": _TRIPLE_ITEM_SCHEMA}
+    }
+)
+
+# Model families that accept json_schema structured outputs; others get JSON mode
+STRUCTURED_OUTPUT_MODELS = ('gpt-4o', 'gpt-4.1', 'gpt-5', 'o1', 'o3', 'o4')
+
+def _find_json_span(text: str, open_char: str, close_char: str) -> Optional[str]:
+    """Find the first balanced open_char...close_char span in one linear pass.
+
+    Brackets inside JSON strings are ignored, so unlike a greedy regex this
+    neither overruns into trailing prose nor backtracks on malformed output.
+    """
+    start = text.find(open_char)
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == open_char:
+            depth += 1
+        elif char == close_char:
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+
+    return None
+
+# Fallback results memoized per text, since mock runs reprocess the same chunks
+FALLBACK_CACHE_SIZE = 4096
+
+@functools.lru_cache(maxsize=FALLBACK_CACHE_SIZE)
+def _basic_entity_terms(text: str) -> Tuple[str, ...]:
+    """Clinical terms mentioned in text, in CLINICAL_TERMS order."""
+    found = {match.group().lower() for match in _CLINICAL_TERM_RE.finditer(text)}
+    return tuple(term for term in CLINICAL_TERMS if term in found)
+
+@functools.lru_cache(maxsize=FALLBACK_CACHE_SIZE)
+def _mock_triple_fields(text: str) -> Tuple[Tuple[str, str, str, float], ...]:
+    """Subject, predicate, object and confidence of the mock triples for text."""
+    words = text.split()[:20]  # Take first 20 words
+
+    mock_triples = []
+    if len(words) >= 3:
+        mock_triples.append((words[0], 'relates_to', words[-1], 0.7))
+
+    if 'study' in text.lower():
+        mock_triples.append(('Clinical Study', 'contains', 'protocol information', 0.8))
+
+    return tuple(mock_triples)
 
 class LLMProcessor:
     """Handles LLM interactions for triple extraction and entity recognition."""
 
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-3.5-turbo"):
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-3.5-turbo",
+                 max_concurrency: int = 8, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 summary_model: str = SUMMARY_MODEL, rpm_limit: int = DEFAULT_RPM,
+                 tpm_limit: int = DEFAULT_TPM):
         self.logger = logging.getLogger(__name__)
-        self.client = openai.OpenAI(api_key=api_key) if api_key else None
+        self.api_key = api_key
+        self.client = _get_client(api_key) if api_key else None
         self.model = model
+        self.summary_model = summary_model
+        # Requests in flight at once for batch_process_chunks and extract_triples_many
+        self.max_concurrency = max_concurrency
+        # Responses keyed by request content; pass cache_dir=None to disable
+        self.cache = LLMCache(cache_dir) if api_key and cache_dir else None
+        # Async requests are paced to the account's rate limits and retried by the dispatcher
+        self.dispatcher = AsyncLLMDispatcher(rpm=rpm_limit, tpm=tpm_limit)
+        self.token_counter = TokenCounter(model)
 
     def extract_triples(self, text: str) -> List[Dict[str, Any]]:
         """Extract subject-predicate-object triples from text."""
@@ -18,121 +273,564 @@ class LLMProcessor:
             self.logger.warning("OpenAI client not initialized - using mock triples")
             return self._generate_mock_triples(text)
 
-        try:
-            prompt = self._create_triple_extraction_prompt(text)
+        if not self._worth_calling(text):
+            return []
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert at extracting structured information from clinical documents."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1
-            )
-
-            result = response.choices[0].message.content
-            return self._parse_triple_response(result)
+        try:
+            request = self._json_request(TRIPLE_SYSTEM_PROMPT, text, TRIPLE_RESPONSE_FORMAT)
+            for attempt in range(TRIPLE_VALIDATION_RETRIES + 1):
+                result = self._complete(request)
+                try:
+                    return self._validated_triples(result)
+                except ValidationError as e:
+                    # Retry only when nothing usable can be salvaged from the response
+                    triples = self._salvage_triples(result)
+                    if triples or attempt == TRIPLE_VALIDATION_RETRIES:
+                        return triples
+                    request = self._feedback_request(request, result, e)
+                    time.sleep(TRIPLE_RETRY_BACKOFF * (attempt + 1))
 
         except Exception as e:
             self.logger.error(f"Error extracting triples: {str(e)}")
             return self._generate_mock_triples(text)
 
-    def _create_triple_extraction_prompt(self, text: str) -> str:
-        """Create a prompt for triple extraction optimized for clinical documents."""
-        return f"""
-        Extract key relationships from the following clinical IRT study design text as subject-predicate-object triples.
-        Focus on:
-        - Medical procedures and their relationships
-        - Study phases and timelines
-        - Regulatory requirements
-        - Investigator roles and responsibilities
-        - Medications and conditions
-
-        Text: {text}
-
-        Return the triples in JSON format as a list of objects with 'subject', 'predicate', 'object', and 'confidence' fields.
-        Confidence should be a float between 0 and 1.
-
-        Example format:
-        [
-            {{"subject": "Phase I Study", "predicate": "includes", "object": "safety assessment", "confidence": 0.9}},
-            {{"subject": "Investigator", "predicate": "responsible_for", "object": "patient enrollment", "confidence": 0.8}}
+    def extract_triples_batch(self, texts: List[str], k: int = TRIPLE_BATCH_SIZE) -> List[List[Dict[str, Any]]]:
+        """Extract triples for many texts, packing k texts into each request."""
+        if not self.client:
+            return [self._generate_mock_triples(text) for text in texts]
+
+        results = [[] for _ in texts]
+        pending = [i for i, text in enumerate(texts) if self._worth_calling(text)]
+        for start in range(0, len(pending), k):
+            batch = pending[start:start + k]
+            prompt = "\n\n".join(
+                f"<<<DOC {i}>>>\n{texts[j]}\n<<<END {i}>>>" for i, j in enumerate(batch)
+            )
+            try:
+                result = self._complete(self._json_request(BATCH_TRIPLE_SYSTEM_PROMPT, prompt, {"type": "json_object"}))
+                batch_triples = self._parse_triple_batch_response(result, len(batch))
+            except Exception as e:
+                self.logger.error(f"Error extracting triple batch: {str(e)}")
+                batch_triples = [None] * len(batch)
+
+            # Texts the model skipped are retried on their own
+            for j, triples in zip(batch, batch_triples):
+                results[j] = triples if triples is not None else self.extract_triples(texts[j])
+
+        return results
+
+    def _parse_triple_batch_response(self, response: str, count: int) -> List[Optional[List[Dict[str, Any]]]]:
+        """Parse a batched response into per-text triples, None where an index is missing."""
+        try:
+            data = _loads(response)
+        except json.JSONDecodeError as e:
+            self.logger.error(f"Error parsing triple batch response: {str(e)}")
+            return [None] * count
+
+        if not isinstance(data, dict):
+            return [None] * count
+
+        batch_triples = []
+        for i in range(count):
+            triples = data.get(str(i))
+            if isinstance(triples, dict):
+                triples = triples.get('triples')
+            batch_triples.append(self._validate_triples(triples) if isinstance(triples, list) else None)
+
+        return batch_triples
+
+    def submit_batch_triples(self, texts: List[str], custom_ids: Optional[List[str]] = None) -> Optional[str]:
+        """Submit triple extraction for many texts as an OpenAI Batch API job.
+
+        Batch jobs cost half as much and draw on a separate rate limit, at the
+        price of completing within 24h; use them for bulk backfills. Returns
+        the batch id, or None if there is no client or no text worth sending.
+        """
+        if not self.client:
+            self.logger.warning("OpenAI client not initialized - cannot submit batch")
+            return None
+
+        if custom_ids is None:
+            custom_ids = [str(i) for i in range(len(texts))]
+
+        lines = [
+            json.dumps({
+                'custom_id': custom_id,
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': self._json_request(TRIPLE_SYSTEM_PROMPT, text, TRIPLE_RESPONSE_FORMAT)
+            })
+            for custom_id, text in zip(custom_ids, texts)
+            if self._worth_calling(text)
         ]
+        if not lines:
+            return None
+
+        try:
+            input_file = self.client.files.create(
+                file=('triples.jsonl', '\n'.join(lines).encode('utf-8')),
+                purpose='batch'
+            )
+            batch = self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint='/v1/chat/completions',
+                completion_window='24h'
+            )
+            return batch.id
+        except Exception as e:
+            self.logger.error(f"Error submitting triple batch: {str(e)}")
+            return None
+
+    def collect_batch(self, batch_id: str, poll_interval: float = BATCH_POLL_INTERVAL,
+                      timeout: Optional[float] = None) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """Wait for a triple batch and return its triples keyed by custom_id.
+
+        Returns None if the batch failed or timeout seconds passed first.
+        Texts that were filtered out or whose request failed have no entry.
         """
+        if not self.client:
+            self.logger.warning("OpenAI client not initialized - cannot collect batch")
+            return None
 
-    def _parse_triple_response(self, response: str) -> List[Dict[str, Any]]:
-        """Parse the LLM response to extract triples."""
         try:
-            # Try to extract JSON from the response
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                triples = json.loads(json_str)
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                batch = self.client.batches.retrieve(batch_id)
+                if batch.status == 'completed':
+                    break
+                if batch.status in BATCH_FAILED_STATUSES:
+                    self.logger.error(f"Triple batch {batch_id} ended with status {batch.status}")
+                    return None
+                if deadline is not None and time.monotonic() >= deadline:
+                    return None
+                time.sleep(poll_interval)
+
+            results = {}
+            if not batch.output_file_id:
+                return results
+
+            output = self.client.files.content(batch.output_file_id).text
+            for line in output.splitlines():
+                if not line:
+                    continue
+                record = _loads(line)
+                response = record.get('response') or {}
+                if response.get('status_code') != 200:
+                    continue
+                content = response['body']['choices'][0]['message']['content']
+                results[record['custom_id']] = self._parse_triple_response(content)
+
+            return results
+        except Exception as e:
+            self.logger.error(f"Error collecting triple batch {batch_id}: {str(e)}")
+            return None
+
+    def _complete(self, request: Dict[str, Any]) -> str:
+        """Run a chat completion, serving repeated requests from the cache."""
+        key = self._request_key(request)
+        cached = self._cached_response(key, request)
+        if cached is not None:
+            return cached
+
+        if 'response_format' in request:
+            content = self._stream_json(request)
+        else:
+            response = self.client.chat.completions.create(**request)
+            content = response.choices[0].message.content
+        self._store_response(key, request, content)
+        return content
+
+    async def _complete_async(self, client: openai.AsyncOpenAI, request: Dict[str, Any]) -> str:
+        """Async counterpart of _complete."""
+        key = self._request_key(request)
+        cached = self._cached_response(key, request)
+        if cached is not None:
+            return cached
+
+        async def send() -> str:
+            if 'response_format' in request:
+                return await self._stream_json_async(client, request)
+            response = await client.chat.completions.create(**request)
+            return response.choices[0].message.content
+
+        content = await self.dispatcher.submit(self._request_tokens(request), send)
+        self._store_response(key, request, content)
+        return content
+
+    def _request_tokens(self, request: Dict[str, Any]) -> int:
+        """Tokens a request draws from the budget: its prompt plus any output cap."""
+        prompt_tokens = sum(self.token_counter.count(message['content']) for message in request['messages'])
+        return prompt_tokens + request.get('max_tokens', 0)
+
+    def _stream_json(self, request: Dict[str, Any]) -> str:
+        """Stream a JSON completion, returning as soon as the top-level object closes."""
+        try:
+            stream = self.client.chat.completions.create(**request, stream=True)
+        except openai.BadRequestError as e:
+            self.logger.warning(f"Streaming not supported, waiting for full response: {str(e)}")
+            response = self.client.chat.completions.create(**request)
+            return response.choices[0].message.content
 
-                # Validate and clean triples
-                valid_triples = []
-                for triple in triples:
-                    if all(key in triple for key in ['subject', 'predicate', 'object']):
-                        triple['confidence'] = float(triple.get('confidence', 0.5))
-                        valid_triples.append(triple)
+        parts = []
+        try:
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                parts.append(delta)
+                # Only a closing brace can complete the object
+                if '}' in delta:
+                    json_span = _find_json_span(''.join(parts), '{', '}')
+                    if json_span is not None:
+                        return json_span
+        finally:
+            stream.close()
+
+        return ''.join(parts)
+
+    async def _stream_json_async(self, client: openai.AsyncOpenAI, request: Dict[str, Any]) -> str:
+        """Async counterpart of _stream_json."""
+        try:
+            stream = await client.chat.completions.create(**request, stream=True)
+        except openai.BadRequestError as e:
+            self.logger.warning(f"Streaming not supported, waiting for full response: {str(e)}")
+            response = await client.chat.completions.create(**request)
+            return response.choices[0].message.content
 
-                return valid_triples
+        parts = []
+        try:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                parts.append(delta)
+                if '}' in delta:
+                    json_span = _find_json_span(''.join(parts), '{', '}')
+                    if json_span is not None:
+                        return json_span
+        finally:
+            await stream.close()
+
+        return ''.join(parts)
+
+    def _request_key(self, request: Dict[str, Any]) -> Optional[str]:
+        """Cache key over everything that determines the model's response."""
+        if not self.cache:
+            return None
+
+        return cache_key(
+            request['model'],
+            *(message['content'] for message in request['messages']),
+            str(request.get('temperature')),
+            str(request.get('max_tokens')),
+            json.dumps(request.get('response_format'), sort_keys=True)
+        )
+
+    def _cached_response(self, key: Optional[str], request: Dict[str, Any]) -> Optional[str]:
+        """Get a cached response, evicting JSON responses that no longer parse."""
+        if key is None:
+            return None
+
+        content = self.cache.get(key)
+        if content is not None and not self._is_valid_response(request, content):
+            self.cache.delete(key)
+            return None
+        return content
+
+    def _store_response(self, key: Optional[str], request: Dict[str, Any], content: Optional[str]):
+        """Cache a response unless it is empty or malformed JSON."""
+        if key is not None and content and self._is_valid_response(request, content):
+            self.cache.set(key, content)
+
+    @staticmethod
+    def _is_valid_response(request: Dict[str, Any], content: str) -> bool:
+        if 'response_format' not in request:
+            return True
+        try:
+            return isinstance(_loads(content), dict)
+        except json.JSONDecodeError:
+            return False
+
+    @staticmethod
+    def _worth_calling(text: str) -> bool:
+        """Cheap check that a chunk has enough clinical prose to justify an LLM call."""
+        if len(_WORD_RE.findall(text)) < MIN_LLM_WORDS:
+            return False
+
+        return _CLINICAL_TERM_RE.search(text) is not None
+
+    def _json_request(self, system_prompt: str, text: str,
+                      response_format: Dict[str, Any]) -> Dict[str, Any]:
+        """Build chat completion arguments for a JSON extraction over text."""
+        if not self.model.startswith(STRUCTURED_OUTPUT_MODELS):
+            response_format = {"type": "json_object"}
+
+        return {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": text}
+            ],
+            'temperature': 0.1,
+            'response_format': response_format
+        }
+
+    @staticmethod
+    def _json_list(response: str, key: str) -> List[Any]:
+        """Get the list under key from a JSON response, tolerating stray prose."""
+        try:
+            data = _loads(response)
+        except json.JSONDecodeError:
+            # Fall back to the first balanced list if the model wrapped it in text
+            json_span = _find_json_span(response, '[', ']')
+            if json_span is None:
+                return []
+            data = _loads(json_span)
+
+        if isinstance(data, dict):
+            data = data.get(key) or []
+        return data if isinstance(data, list) else []
+
+    def _parse_triple_response(self, response: str) -> List[Dict[str, Any]]:
+        """Parse the LLM response to extract triples."""
+        try:
+            return self._validated_triples(response)
+        except ValidationError:
+            return self._salvage_triples(response)
+
+    @staticmethod
+    def _validated_triples(response: str) -> List[Dict[str, Any]]:
+        """Validate a response against TripleList, raising ValidationError if it doesn't match."""
+        triples = TripleList.model_validate_json(response).triples
+        return LLMProcessor._dedupe_triples([triple.model_dump() for triple in triples])
+
+    def _salvage_triples(self, response: str) -> List[Dict[str, Any]]:
+        """Leniently pull complete triples out of a response that failed validation."""
+        try:
+            return self._validate_triples(self._json_list(response, 'triples'))
 
         except Exception as e:
             self.logger.error(f"Error parsing triple response: {str(e)}")
 
         return []
 
+    @staticmethod
+    def _feedback_request(request: Dict[str, Any], response: str, error: ValidationError) -> Dict[str, Any]:
+        """Extend a request with the invalid response and the error, asking for a fix."""
+        return {
+            **request,
+            'messages': request['messages'] + [
+                {"role": "assistant", "content": response},
+                {"role": "user", "content": f"Your output had error: {error}. Fix and retry."}
+            ]
+        }
+
+    @staticmethod
+    def _validate_triples(triples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep complete triples and coerce their confidence to float."""
+        valid_triples = []
+        for triple in triples:
+            # Judge each triple on its own so one bad item doesn't sink the response
+            if not isinstance(triple, dict):
+                continue
+            if not all(isinstance(triple.get(key), str) for key in ['subject', 'predicate', 'object']):
+                continue
+            try:
+                triple['confidence'] = float(triple.get('confidence', 0.5))
+            except (TypeError, ValueError):
+                triple['confidence'] = 0.5
+            valid_triples.append(triple)
+
+        return LLMProcessor._dedupe_triples(valid_triples)
+
+    @staticmethod
+    def _dedupe_triples(triples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Normalize whitespace and drop case-insensitive repeats, keeping the best confidence."""
+        unique = {}
+        for triple in triples:
+            for field in ('subject', 'predicate', 'object'):
+                triple[field] = _WHITESPACE_RE.sub(' ', str(triple[field])).strip()
+            key = (triple['subject'].lower(), triple['predicate'].lower(), triple['object'].lower())
+
+            seen = unique.get(key)
+            if seen is None:
+                unique[key] = triple
+            elif triple['confidence'] > seen['confidence']:
+                seen['confidence'] = triple['confidence']
+
+        return list(unique.values())
+
     def _generate_mock_triples(self, text: str) -> List[Dict[str, Any]]:
         """Generate mock triples for testing when OpenAI is not available."""
-        words = text.split()[:20]  # Take first 20 words
-
-        mock_triples = []
-        if len(words) >= 3:
-            mock_triples.append({
-                'subject': words[0],
-                'predicate': 'relates_to',
-                'object': words[-1],
-                'confidence': 0.7
-            })
-
-        if 'study' in text.lower():
-            mock_triples.append({
-                'subject': 'Clinical Study',
-                'predicate': 'contains',
-                'object': 'protocol information',
-                'confidence': 0.8
-            })
-
-        return mock_triples
+        # Fresh dicts each call; callers may mutate what they get back
+        return [
+            {'subject': subject, 'predicate': predicate, 'object': obj, 'confidence': confidence}
+            for subject, predicate, obj, confidence in _mock_triple_fields(text)
+        ]
 
     def extract_entities(self, text: str) -> List[Dict[str, Any]]:
         """Extract named entities from text."""
         if not self.client:
             return self._extract_basic_entities(text)
 
+        if not self._worth_calling(text):
+            return []
+
+        try:
+            result = self._complete(self._json_request(ENTITY_SYSTEM_PROMPT, text, ENTITY_RESPONSE_FORMAT))
+            return self._parse_entity_response(result)
+
+        except Exception as e:
+            self.logger.error(f"Error extracting entities: {str(e)}")
+            return self._extract_basic_entities(text)
+
+    def extract_combined(self, text: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Extract entities and triples from text with a single LLM call."""
+        if not self.client:
+            return self._extract_basic_entities(text), self._generate_mock_triples(text)
+
+        if not self._worth_calling(text):
+            return [], []
+
         try:
-            prompt = f"""
-            Extract medical and clinical entities from the following text.
-            Categorize them as: PROCEDURE, MEDICATION, CONDITION, PERSON, ORGANIZATION, DATE, LOCATION
+            result = self._complete(self._json_request(COMBINED_SYSTEM_PROMPT, text, COMBINED_RESPONSE_FORMAT))
+            combined = self._parse_combined_response(result)
+            if combined is not None:
+                return combined
+        except Exception as e:
+            self.logger.error(f"Error in combined extraction: {str(e)}")
 
-            Text: {text}
+        # Fall back to the separate prompts
+        return self.extract_entities(text), self.extract_triples(text)
 
-            Return as JSON list with 'entity', 'category', and 'confidence' fields.
-            """
+    def _parse_combined_response(self, response: str) -> Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """Parse a combined extraction response, or return None if it is not valid JSON."""
+        try:
+            combined = _loads(response)
+        except json.JSONDecodeError:
+            # Fall back to the first balanced object if the model wrapped it in text
+            json_span = _find_json_span(response, '{', '}')
+            if json_span is None:
+                return None
+            try:
+                combined = _loads(json_span)
+            except json.JSONDecodeError:
+                return None
+
+        if not isinstance(combined, dict):
+            return None
+
+        entities = combined.get('entities') or []
+        triples = self._validate_triples(combined.get('triples') or [])
+        return entities, triples
+
+    def batch_process_chunks(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Extract entities and triples for a batch of chunks concurrently."""
+        if not chunks:
+            return chunks
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert at medical named entity recognition."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1
-            )
+        if not self.client:
+            for chunk in chunks:
+                text = chunk.get('content', '')
+                chunk['entities'] = self._extract_basic_entities(text)
+                chunk['triples'] = self._generate_mock_triples(text)
+            return chunks
 
-            result = response.choices[0].message.content
-            return self._parse_entity_response(result)
+        asyncio.run(self._process_chunks_async(chunks))
+        return chunks
+
+    async def _process_chunks_async(self, chunks: List[Dict[str, Any]]):
+        """Run the extractions for every chunk, bounded by max_concurrency."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # The async client is bound to this event loop, so it lives for one batch
+        async with self._async_client() as client:
+            async def process(chunk: Dict[str, Any]):
+                text = chunk.get('content', '')
+                async with semaphore:
+                    chunk['entities'], chunk['triples'] = await self._extract_combined_async(client, text)
+
+            await asyncio.gather(*(process(chunk) for chunk in chunks))
+
+    def extract_triples_many(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        """Extract triples for many texts concurrently, in input order."""
+        if not texts:
+            return []
+
+        if not self.client:
+            return [self._generate_mock_triples(text) for text in texts]
 
+        return asyncio.run(self._extract_triples_many_async(texts))
+
+    async def _extract_triples_many_async(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        """Run the triple extractions for every text, bounded by max_concurrency."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._async_client() as client:
+            async def extract(text: str) -> List[Dict[str, Any]]:
+                async with semaphore:
+                    return await self._extract_triples_async(client, text)
+
+            return await asyncio.gather(*(extract(text) for text in texts))
+
+    def _async_client(self) -> openai.AsyncOpenAI:
+        """Create an async client with the shared pool limits for one event loop."""
+        # Retries are left to the dispatcher so backoff respects the shared budgets
+        return openai.AsyncOpenAI(
+            api_key=self.api_key,
+            max_retries=0,
+            http_client=openai.DefaultAsyncHttpxClient(limits=HTTP_LIMITS)
+        )
+
+    async def _extract_combined_async(self, client: openai.AsyncOpenAI,
+                                      text: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Async counterpart of extract_combined."""
+        if not self._worth_calling(text):
+            return [], []
+
+        try:
+            result = await self._complete_async(client, self._json_request(COMBINED_SYSTEM_PROMPT, text, COMBINED_RESPONSE_FORMAT))
+            combined = self._parse_combined_response(result)
+            if combined is not None:
+                return combined
+        except Exception as e:
+            self.logger.error(f"Error in combined extraction: {str(e)}")
+
+        entities, triples = await asyncio.gather(
+            self._extract_entities_async(client, text),
+            self._extract_triples_async(client, text)
+        )
+        return entities, triples
+
+    async def _extract_triples_async(self, client: openai.AsyncOpenAI, text: str) -> List[Dict[str, Any]]:
+        """Async counterpart of extract_triples."""
+        if not self._worth_calling(text):
+            return []
+
+        try:
+            request = self._json_request(TRIPLE_SYSTEM_PROMPT, text, TRIPLE_RESPONSE_FORMAT)
+            for attempt in range(TRIPLE_VALIDATION_RETRIES + 1):
+                result = await self._complete_async(client, request)
+                try:
+                    return self._validated_triples(result)
+                except ValidationError as e:
+                    triples = self._salvage_triples(result)
+                    if triples or attempt == TRIPLE_VALIDATION_RETRIES:
+                        return triples
+                    request = self._feedback_request(request, result, e)
+                    await asyncio.sleep(TRIPLE_RETRY_BACKOFF * (attempt + 1))
+        except Exception as e:
+            self.logger.error(f"Error extracting triples: {str(e)}")
+            return self._generate_mock_triples(text)
+
+    async def _extract_entities_async(self, client: openai.AsyncOpenAI, text: str) -> List[Dict[str, Any]]:
+        """Async counterpart of extract_entities."""
+        if not self._worth_calling(text):
+            return []
+
+        try:
+            result = await self._complete_async(client, self._json_request(ENTITY_SYSTEM_PROMPT, text, ENTITY_RESPONSE_FORMAT))
+            return self._parse_entity_response(result)
         except Exception as e:
             self.logger.error(f"Error extracting entities: {str(e)}")
             return self._extract_basic_entities(text)
@@ -140,10 +838,7 @@ class LLMProcessor:
     def _parse_entity_response(self, response: str) -> List[Dict[str, Any]]:
         """Parse entity extraction response."""
         try:
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
-            if json_match:
-                entities = json.loads(json_match.group())
-                return entities
+            return self._json_list(response, 'entities')
         except Exception as e:
             self.logger.error(f"Error parsing entity response: {str(e)}")
 
@@ -151,20 +846,15 @@ class LLMProcessor:
 
     def _extract_basic_entities(self, text: str) -> List[Dict[str, Any]]:
         """Basic entity extraction using patterns."""
-        entities = []
-
         # Simple pattern matching for common clinical terms
-        clinical_terms = ['study', 'trial', 'patient', 'protocol', 'phase', 'treatment', 'medication']
-
-        for term in clinical_terms:
-            if term.lower() in text.lower():
-                entities.append({
-                    'entity': term,
-                    'category': 'PROCEDURE' if term in ['study', 'trial', 'protocol'] else 'GENERAL',
-                    'confidence': 0.6
-                })
-
-        return entities
+        return [
+            {
+                'entity': term,
+                'category': 'PROCEDURE' if term in PROCEDURE_TERMS else 'GENERAL',
+                'confidence': 0.6
+            }
+            for term in _basic_entity_terms(text)
+        ]
 
     def generate_summary(self, text: str, max_length: int = 200) -> str:
         """Generate a summary of the text."""
@@ -178,19 +868,21 @@ class LLMProcessor:
             Summarize the following clinical document text in {max_length} characters or less.
             Focus on key study objectives, procedures, and requirements.
 
-            Text: {text}
+            Text: {text[:SUMMARY_MAX_INPUT_CHARS]}
             """
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            summary = self._complete({
+                'model': self.summary_model,
+                'messages': [
                     {"role": "system", "content": "You are an expert at summarizing clinical documents."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.3
-            )
+                'temperature': 0.3,
+                # Anything past max_length is cut off, so don't generate it
+                'max_tokens': max(64, max_length // CHARS_PER_TOKEN)
+            })
 
-            return response.choices[0].message.content[:max_length]
+            return summary[:max_length]
 
         except Exception as e:
             self.logger.error(f"Error generating summary: {str(e)}")
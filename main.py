@@ -1,7 +1,6 @@
 
 import streamlit as st
 import sys
-import os
 from pathlib import Path
 
 # Add the project root to the Python path
@@ -11,8 +10,7 @@ sys.path.insert(0, str(project_root))
 from ui.upload_interface import UploadInterface
 from ui.admin_dashboard import AdminDashboard
 from ui.search_interface import SearchInterface
-from core.graph_manager import GraphManager
-from config.neo4j_config import Neo4jConfig
+from ui.resources import get_graph_manager
 
 def main():
     st.set_page_config(
@@ -27,8 +25,10 @@ def main():
     
     # Initialize Neo4j connection
     try:
-        graph_manager = GraphManager()
-        graph_manager.initialize_database()
+        graph_manager = get_graph_manager()
+        if graph_manager.driver is None:
+            # Don't keep a mock-mode manager cached; retry the connection next rerun
+            get_graph_manager.clear()
     except Exception as e:
         st.error(f"Failed to connect to Neo4j: {str(e)}")
         st.stop()
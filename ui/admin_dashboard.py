@@ -1,24 +1,272 @@
 
 import streamlit as st
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 import pandas as pd
-from datetime import datetime
+import csv
+import io
 import logging
 
-from core.graph_manager import GraphManager
+from core.graph_manager import GraphManager, READ_CACHE_TTL
+from ui.resources import get_graph_manager
+
+# Characters of chunk content shown in the details preview; one more is
+# fetched so the preview can tell whether the content was cut
+PREVIEW_CHARS = 500
+
+# Documents listed per page of the management table
+DOCUMENTS_PAGE_SIZE = 25
+
+def _csv_bytes(rows: Iterable[Dict[str, Any]], fieldnames: List[str]) -> bytes:
+    """Write rows straight to CSV bytes without building a DataFrame."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+@st.cache_data(max_entries=4, ttl=READ_CACHE_TTL, show_spinner=False)
+def _export_csvs(_graph_manager: GraphManager, cache_generation: int) -> Tuple[bytes, bytes]:
+    """Summary and document-list CSVs, serialized once per read-cache generation."""
+    stats = _graph_manager.get_statistics()
+    documents = _graph_manager.get_all_documents()
+    
+    summary_rows = [
+        {'Metric': 'Total Documents', 'Value': stats['total_documents']},
+        {'Metric': 'Total Chunks', 'Value': stats['total_chunks']},
+        {'Metric': 'Total Words', 'Value': stats['total_words']},
+        {'Metric': 'Total Triples', 'Value': stats['total_triples']}
+    ]
+    
+    doc_rows = (
+        {
+            'Document Name': doc['name'],
+            'Upload Date': doc['upload_date'],
+            'Status': doc['status'],
+            'Total Chunks': doc['total_chunks'],
+            'Actual Chunks': doc['actual_chunks']
+        }
+        for doc in documents
+    )
+    
+    return (
+        _csv_bytes(summary_rows, ['Metric', 'Value']),
+        _csv_bytes(doc_rows, ['Document Name', 'Upload Date', 'Status', 'Total Chunks', 'Actual Chunks'])
+    )
+
+def _documents_df(documents: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Document table with derived columns computed column-wise, not per rendered row."""
+    metadata = [doc.get('metadata') or {} for doc in documents]
+    docs_df = pd.DataFrame({
+        'Name': [doc['name'] for doc in documents],
+        'Uploaded': [doc['upload_date'][:10] for doc in documents],
+        'Status': [doc['status'] for doc in documents],
+        'Chunks': [doc['total_chunks'] for doc in documents],
+        'Pages': [meta.get('num_pages') for meta in metadata]
+    })
+    
+    total_chunks = pd.to_numeric(docs_df['Chunks'], errors='coerce')
+    actual_chunks = pd.Series([doc['actual_chunks'] for doc in documents], dtype='float64')
+    docs_df['Efficiency'] = (actual_chunks / total_chunks.where(total_chunks > 0) * 100).fillna(0)
+    file_sizes = pd.to_numeric(pd.Series([meta.get('file_size') for meta in metadata]), errors='coerce')
+    docs_df['Size (MB)'] = file_sizes / (1024 * 1024)
+    return docs_df
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _metadata_df(document_name: str, metadata_items: Tuple[Tuple[str, str], ...]) -> pd.DataFrame:
+    """Metadata table for a document, rebuilt only when its metadata changes."""
+    return pd.DataFrame(
+        [{'Property': k.replace('_', ' ').title(), 'Value': v} for k, v in metadata_items],
+        columns=['Property', 'Value']
+    )
+
+def _delete_document(graph_manager: GraphManager, document_name: str, key_prefix: str = "del"):
+    """Delete a document with confirmation."""
+    if st.checkbox(f"Confirm deletion of '{document_name}'", key=f"{key_prefix}_confirm_{document_name}"):
+        if st.button("❌ Delete Permanently", type="secondary", key=f"{key_prefix}_btn_{document_name}"):
+            try:
+                success = graph_manager.delete_document(document_name)
+                if success:
+                    st.success(f"Document '{document_name}' deleted successfully!")
+                    st.rerun()
+                else:
+                    st.error(f"Failed to delete document '{document_name}'")
+            except Exception as e:
+                st.error(f"Error deleting document: {str(e)}")
+
+@st.dialog("📄 Document Details", width="large")
+def _document_details_dialog(graph_manager: GraphManager, document: Dict[str, Any],
+                             preview_chunks: Optional[List[Dict[str, Any]]] = None):
+    """Dialog with detailed information about a document.
+
+    Widgets inside the dialog rerun only the dialog; any full-app rerun
+    closes it, as the dialog is opened only from the View Details click.
+    """
+    st.subheader(document['name'])
+    
+    # Look each field up once; the dialog body reruns on every interaction
+    metadata = document.get('metadata') or {}
+    total_chunks = document['total_chunks']
+    actual_chunks = document['actual_chunks']
+    status = document['status']
+    title = metadata.get('title')
+    author = metadata.get('author')
+    creation_date = metadata.get('creation_date')
+    # Derived figures come precomputed from the document table
+    file_size_mb = document.get('file_size_mb')
+    chunk_efficiency = document.get('chunk_efficiency', 0)
+    file_format = metadata.get('format')
+    processing_time = metadata.get('processing_time')
+    embeddings_generated = metadata.get('embeddings_generated')
+    entities_extracted = metadata.get('entities_extracted')
+    
+    # Document header with key metrics
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("📊 Total Chunks", total_chunks)
+    with col2:
+        st.metric("✅ Actual Chunks", actual_chunks)
+    with col3:
+        st.metric("📖 Pages", metadata.get('num_pages', 'N/A'))
+    with col4:
+        st.metric("📅 Upload Date", document['upload_date'])
+    
+    st.divider()
+    
+    # Status and basic info
+    col1, col2 = st.columns(2)
+    with col1:
+        status_color = "🟢" if status == 'completed' else "🟡"
+        st.markdown(f"**Status:** {status_color} {status.title()}")
+        
+        if title:
+            st.markdown(f"**Title:** {title}")
+        
+        if author:
+            st.markdown(f"**Author:** {author}")
+    
+    with col2:
+        if creation_date:
+            st.markdown(f"**Created:** {creation_date}")
+        
+        if file_size_mb:
+            st.markdown(f"**File Size:** {file_size_mb:.1f} MB")
+        
+        if file_format:
+            st.markdown(f"**Format:** {file_format}")
+    
+    # Full metadata in expandable section
+    if metadata:
+        with st.expander("🔍 Complete Metadata", expanded=False):
+            metadata_df = _metadata_df(
+                document['name'], tuple((k, str(v)) for k, v in metadata.items())
+            )
+            
+            if not metadata_df.empty:
+                st.dataframe(
+                    metadata_df, 
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "Property": st.column_config.TextColumn("Property", width="medium"),
+                        "Value": st.column_config.TextColumn("Value", width="large")
+                    }
+                )
+    
+    # Processing information
+    st.subheader("⚙️ Processing Information")
+    
+    processing_col1, processing_col2 = st.columns(2)
+    with processing_col1:
+        st.metric("📈 Chunk Efficiency", f"{chunk_efficiency:.1f}%")
+        
+        if processing_time:
+            st.metric("⏱️ Processing Time", f"{processing_time:.1f}s")
+    
+    with processing_col2:
+        if embeddings_generated:
+            st.metric("🧠 Embeddings", "✅ Generated" if embeddings_generated else "❌ Not Generated")
+        
+        if entities_extracted:
+            st.metric("🏷️ Entities", "✅ Extracted" if entities_extracted else "❌ Not Extracted")
+    
+    # Chunk preview
+    st.subheader("📄 Chunk Preview")
+    try:
+        # Get sample chunks for this document, unless they were prefetched
+        sample_chunks = preview_chunks
+        if sample_chunks is None:
+            sample_chunks = graph_manager.get_document_chunks(
+                document['name'], limit=3, content_chars=PREVIEW_CHARS + 1
+            )
+        
+        if sample_chunks:
+            for i, chunk in enumerate(sample_chunks):
+                with st.expander(f"Sample Chunk {i+1} - Page {chunk.get('page_number', 'N/A')}", expanded=i == 0):
+                    chunk_col1, chunk_col2, chunk_col3 = st.columns(3)
+                    with chunk_col1:
+                        st.caption(f"Type: {chunk.get('chunk_type', 'N/A')}")
+                    with chunk_col2:
+                        st.caption(f"Words: {chunk.get('word_count', 'N/A')}")
+                    with chunk_col3:
+                        st.caption(f"Characters: {chunk.get('char_count', 'N/A')}")
+                    
+                    content = chunk.get('content', '')
+                    preview = content[:PREVIEW_CHARS] + "..." if len(content) > PREVIEW_CHARS else content
+                    st.text_area(
+                        "Content Preview",
+                        preview,
+                        height=120,
+                        key=f"chunk_preview_{i}",
+                        disabled=True
+                    )
+        else:
+            st.info("No chunk data available for preview.")
+    except Exception as e:
+        st.warning(f"Could not load chunk preview: {str(e)}")
+    
+    # Action buttons
+    st.divider()
+    action_col1, action_col2, action_col3 = st.columns(3)
+    
+    with action_col1:
+        if st.button("🔄 Reprocess Document", type="secondary", use_container_width=True):
+            st.info("Document reprocessing would be implemented here.")
+    
+    with action_col2:
+        if st.button("📊 View Analytics", type="secondary", use_container_width=True):
+            st.info("Document analytics would be displayed here.")
+    
+    with action_col3:
+        # Keys differ from the table's controls, which render in the same run
+        with st.popover("❌ Delete Document", use_container_width=True):
+            _delete_document(graph_manager, document['name'], key_prefix="dialog_del")
+    
+    if st.button("Close", use_container_width=True):
+        # A full rerun doesn't reopen the dialog, so this closes it
+        st.rerun()
 
 class AdminDashboard:
     """Admin dashboard for managing documents and viewing statistics."""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.graph_manager = GraphManager()
+        self.graph_manager = get_graph_manager()
     
     def render(self):
         """Render the admin dashboard."""
         st.header("🏗️ Admin Dashboard")
         
-        # Get statistics
+        self._render_statistics()
+        self._render_documents()
+        
+        # Bulk operations
+        st.subheader("🔧 Bulk Operations")
+        if st.button("🧹 Cleanup Database", type="secondary"):
+            self._cleanup_database()
+    
+    @st.fragment
+    def _render_statistics(self):
+        """Render the statistics cards; refreshing reruns only this fragment."""
         stats = self.graph_manager.get_statistics()
         
         # Top statistics cards
@@ -34,219 +282,103 @@ class AdminDashboard:
         with col4:
             st.metric("Total Triples", stats['total_triples'])
         
+        if st.button("🔄 Refresh Statistics"):
+            # Reads are cached in GraphManager; force fresh ones
+            self.graph_manager.clear_cache()
+            st.rerun(scope="fragment")
+    
+    @st.fragment
+    def _render_documents(self):
+        """Render the document table; selecting a row reruns only this fragment."""
         # Document management section
         st.subheader("📂 Document Management")
         
-        # Get all documents
-        documents = self.graph_manager.get_all_documents()
-        
-        if not documents:
+        total_documents = self.graph_manager.get_statistics()['total_documents']
+        if not total_documents:
             st.info("No documents found in the database.")
             return
         
-        # Display documents as cards
-        for doc in documents:
-            with st.container():
-                col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
-                
-                with col1:
-                    st.markdown(f"**{doc['name']}**")
-                    st.caption(f"Uploaded: {doc['upload_date'][:10]}")
-                    st.caption(f"Status: {doc['status']}")
-                
-                with col2:
-                    st.metric("Chunks", doc['total_chunks'])
-                
-                with col3:
-                    # File size from metadata
-                    metadata = doc.get('metadata', {})
-                    pages = metadata.get('num_pages', 'N/A')
-                    st.metric("Pages", pages)
-                
-                with col4:
-                    # Action buttons
-                    col4a, col4b = st.columns(2)
-                    with col4a:
-                        if st.button("🔍", key=f"view_{doc['name']}", help="View Details"):
-                            st.session_state[f"show_modal_{doc['name']}"] = True
-                            self._show_document_details(doc)
-                    with col4b:
-                        if st.button("🗑️", key=f"delete_{doc['name']}", help="Delete Document"):
-                            self._delete_document(doc['name'])
-                
-                st.divider()
+        # Only the current page is fetched from the database
+        page_count = -(-total_documents // DOCUMENTS_PAGE_SIZE)
+        # Deletes can leave the remembered page past the end
+        if st.session_state.get('documents_page', 1) > page_count:
+            st.session_state['documents_page'] = page_count
+        page = st.number_input("Page", min_value=1, max_value=page_count, key="documents_page")
+        st.caption(f"Page {page} of {page_count} · {total_documents} documents")
+        documents = self.graph_manager.get_documents_page(
+            (page - 1) * DOCUMENTS_PAGE_SIZE, DOCUMENTS_PAGE_SIZE
+        )
         
-        # Bulk operations
-        st.subheader("🔧 Bulk Operations")
-        col1, col2 = st.columns(2)
+        if not documents:
+            st.info("No documents on this page.")
+            return
         
-        with col1:
-            if st.button("🔄 Refresh Statistics"):
-                st.rerun()
+        self._prefetch_chunk_previews(documents)
         
-        with col2:
-            if st.button("🧹 Cleanup Database", type="secondary"):
-                self._cleanup_database()
-    
-    def _show_document_details(self, document: Dict[str, Any]):
-        """Show detailed information about a document in a modal dialog."""
-        # Initialize modal state
-        if f"show_modal_{document['name']}" not in st.session_state:
-            st.session_state[f"show_modal_{document['name']}"] = True
+        # One table for all documents; the actions apply to the selected row
+        docs_df = _documents_df(documents)
+        event = st.dataframe(
+            docs_df,
+            use_container_width=True,
+            hide_index=True,
+            on_select="rerun",
+            selection_mode="single-row",
+            # Row selections are positions within a page
+            key=f"documents_table_{page}",
+            column_config={
+                "Name": st.column_config.TextColumn("Document", width="large"),
+                "Uploaded": st.column_config.TextColumn("Uploaded", width="small"),
+                "Status": st.column_config.TextColumn("Status", width="small"),
+                "Chunks": st.column_config.NumberColumn("Chunks", format="%d", width="small"),
+                "Pages": st.column_config.NumberColumn("Pages", format="%d", width="small"),
+                "Efficiency": st.column_config.ProgressColumn(
+                    "Chunk Efficiency", format="%.1f%%", min_value=0, max_value=100, width="small"
+                ),
+                "Size (MB)": st.column_config.NumberColumn("Size (MB)", format="%.1f", width="small")
+            }
+        )
         
-        # Modal dialog using st.dialog
-        @st.dialog(f"📄 Document Details: {document['name']}", width="large")
-        def document_modal():
-            # Document header with key metrics
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("📊 Total Chunks", document['total_chunks'])
-            with col2:
-                st.metric("✅ Actual Chunks", document['actual_chunks'])
-            with col3:
-                metadata = document.get('metadata', {})
-                st.metric("📖 Pages", metadata.get('num_pages', 'N/A'))
-            with col4:
-                st.metric("📅 Upload Date", document['upload_date'])
-            
-            st.divider()
-            
-            # Status and basic info
+        # A stale selection can point past the end after a delete
+        selected_rows = [row for row in event.selection.rows if row < len(documents)]
+        if selected_rows:
+            row = selected_rows[0]
+            file_size_mb = docs_df['Size (MB)'].iat[row]
+            doc = {
+                **documents[row],
+                'chunk_efficiency': float(docs_df['Efficiency'].iat[row]),
+                'file_size_mb': None if pd.isna(file_size_mb) else float(file_size_mb)
+            }
             col1, col2 = st.columns(2)
             with col1:
-                status_color = "🟢" if document['status'] == 'completed' else "🟡"
-                st.markdown(f"**Status:** {status_color} {document['status'].title()}")
-                
-                if metadata.get('title'):
-                    st.markdown(f"**Title:** {metadata['title']}")
-                
-                if metadata.get('author'):
-                    st.markdown(f"**Author:** {metadata['author']}")
-            
+                if st.button("🔍 View Details", key=f"view_{doc['name']}", use_container_width=True):
+                    self._show_document_details(doc)
             with col2:
-                if metadata.get('creation_date'):
-                    st.markdown(f"**Created:** {metadata['creation_date']}")
-                
-                if metadata.get('file_size'):
-                    file_size_mb = metadata['file_size'] / (1024 * 1024)
-                    st.markdown(f"**File Size:** {file_size_mb:.1f} MB")
-                
-                if metadata.get('format'):
-                    st.markdown(f"**Format:** {metadata['format']}")
-            
-            # Full metadata in expandable section
-            if document.get('metadata'):
-                with st.expander("🔍 Complete Metadata", expanded=False):
-                    metadata_items = []
-                    for k, v in document['metadata'].items():
-                        metadata_items.append({
-                            'Property': k.replace('_', ' ').title(), 
-                            'Value': str(v)
-                        })
-                    
-                    if metadata_items:
-                        metadata_df = pd.DataFrame(metadata_items)
-                        st.dataframe(
-                            metadata_df, 
-                            use_container_width=True,
-                            hide_index=True,
-                            column_config={
-                                "Property": st.column_config.TextColumn("Property", width="medium"),
-                                "Value": st.column_config.TextColumn("Value", width="large")
-                            }
-                        )
-            
-            # Processing information
-            st.subheader("⚙️ Processing Information")
-            
-            processing_col1, processing_col2 = st.columns(2)
-            with processing_col1:
-                chunk_efficiency = (document['actual_chunks'] / document['total_chunks'] * 100) if document['total_chunks'] > 0 else 0
-                st.metric("📈 Chunk Efficiency", f"{chunk_efficiency:.1f}%")
-                
-                if metadata.get('processing_time'):
-                    st.metric("⏱️ Processing Time", f"{metadata['processing_time']:.1f}s")
-            
-            with processing_col2:
-                if metadata.get('embeddings_generated'):
-                    st.metric("🧠 Embeddings", "✅ Generated" if metadata['embeddings_generated'] else "❌ Not Generated")
-                
-                if metadata.get('entities_extracted'):
-                    st.metric("🏷️ Entities", "✅ Extracted" if metadata['entities_extracted'] else "❌ Not Extracted")
-            
-            # Chunk preview
-            st.subheader("📄 Chunk Preview")
-            try:
-                # Get sample chunks for this document
-                sample_chunks = self.graph_manager.get_document_chunks(document['name'], limit=3)
-                
-                if sample_chunks:
-                    for i, chunk in enumerate(sample_chunks):
-                        with st.expander(f"Sample Chunk {i+1} - Page {chunk.get('page_number', 'N/A')}", expanded=i == 0):
-                            chunk_col1, chunk_col2, chunk_col3 = st.columns(3)
-                            with chunk_col1:
-                                st.caption(f"Type: {chunk.get('chunk_type', 'N/A')}")
-                            with chunk_col2:
-                                st.caption(f"Words: {chunk.get('word_count', 'N/A')}")
-                            with chunk_col3:
-                                st.caption(f"Characters: {chunk.get('char_count', 'N/A')}")
-                            
-                            content = chunk.get('content', '')
-                            preview = content[:500] + "..." if len(content) > 500 else content
-                            st.text_area(
-                                "Content Preview",
-                                preview,
-                                height=120,
-                                key=f"chunk_preview_{i}",
-                                disabled=True
-                            )
-                else:
-                    st.info("No chunk data available for preview.")
-            except Exception as e:
-                st.warning(f"Could not load chunk preview: {str(e)}")
-            
-            # Action buttons
-            st.divider()
-            action_col1, action_col2, action_col3 = st.columns(3)
-            
-            with action_col1:
-                if st.button("🔄 Reprocess Document", type="secondary", use_container_width=True):
-                    st.info("Document reprocessing would be implemented here.")
-            
-            with action_col2:
-                if st.button("📊 View Analytics", type="secondary", use_container_width=True):
-                    st.info("Document analytics would be displayed here.")
-            
-            with action_col3:
-                if st.button("❌ Delete Document", type="secondary", use_container_width=True):
-                    if st.checkbox("Confirm deletion", key="delete_confirm_modal"):
-                        try:
-                            success = self.graph_manager.delete_document(document['name'])
-                            if success:
-                                st.success("Document deleted successfully!")
-                                st.rerun()
-                            else:
-                                st.error("Failed to delete document")
-                        except Exception as e:
-                            st.error(f"Error deleting document: {str(e)}")
-        
-        # Show the modal
-        if st.session_state[f"show_modal_{document['name']}"]:
-            document_modal()
+                # The confirmation only renders once the popover is opened
+                with st.popover("🗑️ Delete Document", use_container_width=True):
+                    _delete_document(self.graph_manager, doc['name'])
+        else:
+            st.caption("Select a document to view its details or delete it.")
     
-    def _delete_document(self, document_name: str):
-        """Delete a document with confirmation."""
-        if st.checkbox(f"Confirm deletion of '{document_name}'"):
-            if st.button("❌ Delete Permanently", type="secondary"):
-                try:
-                    success = self.graph_manager.delete_document(document_name)
-                    if success:
-                        st.success(f"Document '{document_name}' deleted successfully!")
-                        st.rerun()
-                    else:
-                        st.error(f"Failed to delete document '{document_name}'")
-                except Exception as e:
-                    st.error(f"Error deleting document: {str(e)}")
+    def _show_document_details(self, document: Dict[str, Any]):
+        """Show detailed information about a document in a modal dialog."""
+        previews = st.session_state.get('chunk_previews', {}).get('previews', {})
+        _document_details_dialog(self.graph_manager, document, previews.get(document['name']))
+    
+    def _prefetch_chunk_previews(self, documents: List[Dict[str, Any]]):
+        """Fetch chunk previews for every listed document in one query, once per session."""
+        names = tuple(doc['name'] for doc in documents)
+        cached = st.session_state.get('chunk_previews')
+        if cached is not None and cached['names'] == names:
+            return
+        
+        try:
+            previews = self.graph_manager.get_document_previews(
+                names, limit=3, content_chars=PREVIEW_CHARS + 1
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not prefetch chunk previews: {str(e)}")
+            return
+        st.session_state['chunk_previews'] = {'names': names, 'previews': previews}
     
     def _cleanup_database(self):
         """Cleanup database operations."""
@@ -272,44 +404,24 @@ class AdminDashboard:
     
     def _export_statistics(self):
         """Export statistics to CSV."""
-        stats = self.graph_manager.get_statistics()
-        documents = self.graph_manager.get_all_documents()
-        
-        # Create summary dataframe
-        summary_data = {
-            'Metric': ['Total Documents', 'Total Chunks', 'Total Words', 'Total Triples'],
-            'Value': [stats['total_documents'], stats['total_chunks'], 
-                     stats['total_words'], stats['total_triples']]
-        }
-        
-        summary_df = pd.DataFrame(summary_data)
-        
-        # Document details dataframe
-        doc_data = []
-        for doc in documents:
-            doc_data.append({
-                'Document Name': doc['name'],
-                'Upload Date': doc['upload_date'],
-                'Status': doc['status'],
-                'Total Chunks': doc['total_chunks'],
-                'Actual Chunks': doc['actual_chunks']
-            })
-        
-        docs_df = pd.DataFrame(doc_data)
+        # Writes bump the generation, which invalidates the serialized exports
+        summary_csv, documents_csv = _export_csvs(
+            self.graph_manager, self.graph_manager.cache_stats()['generation']
+        )
         
         # Download buttons
         col1, col2 = st.columns(2)
         with col1:
             st.download_button(
                 "Download Summary",
-                summary_df.to_csv(index=False),
+                summary_csv,
                 file_name="database_summary.csv",
                 mime="text/csv"
             )
         with col2:
             st.download_button(
                 "Download Documents",
-                docs_df.to_csv(index=False),
+                documents_csv,
                 file_name="documents_list.csv",
                 mime="text/csv"
             )
@@ -0,0 +1,33 @@
+import streamlit as st
+
+from core.document_processor import DocumentProcessor
+from core.embedding_manager import EmbeddingManager
+from core.graph_manager import GraphManager
+from utils.cost_calculator import CostCalculator
+
+@st.cache_resource
+def get_graph_manager() -> GraphManager:
+    """Get the GraphManager shared across reruns and sessions, initialized once."""
+    graph_manager = GraphManager()
+    graph_manager.initialize_database()
+    return graph_manager
+
+@st.cache_resource
+def get_document_processor() -> DocumentProcessor:
+    """Get the stateless DocumentProcessor, so its tokenizer loads once per process."""
+    return DocumentProcessor()
+
+@st.cache_resource
+def get_cost_calculator() -> CostCalculator:
+    """Get the stateless CostCalculator, so its tokenizer loads once per process."""
+    return CostCalculator()
+
+def get_session_embedding_manager() -> EmbeddingManager:
+    """Get this session's upload EmbeddingManager, kept across reruns.
+
+    It is refitted per processed document, so unlike the cached resources
+    above it is never shared between sessions.
+    """
+    if 'embedding_manager' not in st.session_state:
+        st.session_state['embedding_manager'] = EmbeddingManager()
+    return st.session_state['embedding_manager']
@@ -1,23 +1,45 @@
 
 import streamlit as st
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import logging
+import re
 
-from core.graph_manager import GraphManager
-from core.embedding_manager import EmbeddingManager
+from ui.resources import get_graph_manager
+
+# Reciprocal rank fusion damping; 60 is the usual choice from the RRF paper
+RRF_K = 60
+
+# Characters of a result shown when full context is off; one more is fetched
+# so the snippet can tell whether the content was cut
+SNIPPET_CHARS = 300
+
+# Distinct queries remembered per session; the oldest is dropped first
+SEARCH_HISTORY_SIZE = 20
+
+@functools.lru_cache(maxsize=256)
+def _highlight_pattern(query: str) -> re.Pattern:
+    """One case-insensitive alternation over the query's terms, longest first."""
+    terms = sorted(set(query.split()), key=len, reverse=True)
+    return re.compile('|'.join(map(re.escape, terms)), re.IGNORECASE)
 
 class SearchInterface:
     """Search interface for document content."""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.graph_manager = GraphManager()
-        self.embedding_manager = EmbeddingManager()
+        self.graph_manager = get_graph_manager()
     
     def render(self):
         """Render the search interface."""
         st.header("🔍 Search Documents")
         
+        # Search history, with a set alongside for constant-time duplicate checks
+        st.session_state.setdefault('search_history', deque(maxlen=SEARCH_HISTORY_SIZE))
+        st.session_state.setdefault('search_history_set', set())
+        
         # Search input
         search_query = st.text_input(
             "Enter your search query",
@@ -49,14 +71,16 @@ class SearchInterface:
         with st.expander("🔧 Advanced Search Options"):
             st.subheader("Filters")
             
-            # Document filter
-            documents = self.graph_manager.get_all_documents()
-            doc_names = [doc['name'] for doc in documents]
+            # Document filter; names are looked up on the server as the user types
+            name_prefix = st.text_input("Find Documents", placeholder="Start of a document name")
+            selected_docs = st.session_state.get('filter_documents', [])
+            doc_names = sorted(set(self.graph_manager.get_document_names(name_prefix)) | set(selected_docs))
             
             selected_docs = st.multiselect(
                 "Filter by Documents",
                 doc_names,
-                default=doc_names
+                key="filter_documents",
+                placeholder="All documents"
             )
             
             # Page range filter
@@ -74,12 +98,9 @@ class SearchInterface:
             )
         
         # Search history
-        if 'search_history' not in st.session_state:
-            st.session_state.search_history = []
-        
         if st.session_state.search_history:
             st.subheader("📚 Recent Searches")
-            for i, query in enumerate(st.session_state.search_history[-5:]):
+            for i, query in enumerate(list(st.session_state.search_history)[-5:]):
                 if st.button(f"🔄 {query}", key=f"history_{i}"):
                     st.session_state.search_query = query
                     st.rerun()
@@ -87,19 +108,26 @@ class SearchInterface:
     def _perform_search(self, query: str, search_type: str, max_results: int, include_context: bool):
         """Perform search based on query and type."""
         try:
+            # Snippet-only results need just the start of each chunk from the database
+            content_chars = None if include_context else SNIPPET_CHARS + 1
             with st.spinner("Searching..."):
                 if search_type == "Text Search":
-                    results = self._text_search(query, max_results)
+                    results = self._text_search(query, max_results, content_chars)
                 elif search_type == "Semantic Search":
-                    results = self._semantic_search(query, max_results)
+                    results = self._semantic_search(query, max_results, content_chars)
                 else:  # Combined
-                    text_results = self._text_search(query, max_results // 2)
-                    semantic_results = self._semantic_search(query, max_results // 2)
-                    results = self._combine_results(text_results, semantic_results)
+                    # Both searches are independent round-trips, so overlap them
+                    with ThreadPoolExecutor(max_workers=2) as executor:
+                        text_future = executor.submit(self.graph_manager.search_chunks,
+                                                      query, max_results // 2, content_chars)
+                        semantic_future = executor.submit(self._semantic_search,
+                                                          query, max_results // 2, content_chars)
+                        text_results = text_future.result()
+                        semantic_results = semantic_future.result()
+                    results = self._combine_results(text_results, semantic_results, max_results)
                 
                 # Add to search history
-                if query not in st.session_state.search_history:
-                    st.session_state.search_history.append(query)
+                self._remember_query(query)
                 
                 # Display results
                 self._display_results(results, include_context)
@@ -108,59 +136,64 @@ class SearchInterface:
             st.error(f"Search error: {str(e)}")
             self.logger.error(f"Search error: {str(e)}")
     
-    def _text_search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
-        """Perform text-based search."""
-        return self.graph_manager.search_chunks(query, max_results)
+    def _remember_query(self, query: str):
+        """Add a query to the bounded search history unless it is already there."""
+        history = st.session_state.search_history
+        seen = st.session_state.search_history_set
+        if query in seen:
+            return
+        
+        if len(history) == history.maxlen:
+            seen.discard(history[0])
+        history.append(query)
+        seen.add(query)
     
-    def _semantic_search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+    def _text_search(self, query: str, max_results: int,
+                     content_chars: Optional[int] = None) -> Iterable[Dict[str, Any]]:
+        """Perform text-based search, streaming results as the database returns them."""
+        return self.graph_manager.iter_search_chunks(query, max_results, content_chars)
+    
+    def _semantic_search(self, query: str, max_results: int,
+                         content_chars: Optional[int] = None) -> List[Dict[str, Any]]:
         """Perform semantic search using embeddings."""
         # This would require getting all chunks with embeddings
         # For now, return text search results
-        return self.graph_manager.search_chunks(query, max_results)
+        return self.graph_manager.search_chunks(query, max_results, content_chars)
     
     def _combine_results(self, text_results: List[Dict[str, Any]], 
-                        semantic_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Combine text and semantic search results."""
-        combined = []
-        seen_chunks = set()
-        
-        # Add text results first
-        for result in text_results:
-            chunk_id = result['chunk_id']
-            if chunk_id not in seen_chunks:
-                result['search_type'] = 'text'
-                combined.append(result)
-                seen_chunks.add(chunk_id)
-        
-        # Add semantic results
-        for result in semantic_results:
-            chunk_id = result['chunk_id']
-            if chunk_id not in seen_chunks:
-                result['search_type'] = 'semantic'
-                combined.append(result)
-                seen_chunks.add(chunk_id)
-        
-        return combined
-    
-    def _display_results(self, results: List[Dict[str, Any]], include_context: bool):
-        """Display search results."""
-        if not results:
-            st.info("No results found for your query.")
-            return
+                        semantic_results: List[Dict[str, Any]],
+                        max_results: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Combine text and semantic search results with reciprocal rank fusion."""
+        fused = {}
         
-        st.subheader(f"🎯 Search Results ({len(results)} found)")
+        for search_type, results in (('text', text_results), ('semantic', semantic_results)):
+            # Ranks are 1-based, so the top hit scores 1 / (k + 1)
+            for rank, result in enumerate(results, start=1):
+                score = 1 / (RRF_K + rank)
+                entry = fused.get(result['chunk_id'])
+                if entry is None:
+                    # Chunks found by both searches keep the type that found them first
+                    fused[result['chunk_id']] = {**result, 'search_type': search_type, 'rrf_score': score}
+                else:
+                    entry['rrf_score'] += score
         
+        combined = sorted(fused.values(), key=lambda result: result['rrf_score'], reverse=True)
+        return combined[:max_results] if max_results is not None else combined
+    
+    def _display_results(self, results: Iterable[Dict[str, Any]], include_context: bool):
+        """Display search results, drawing each one as soon as it arrives."""
+        header = st.empty()
+        header.subheader("🎯 Search Results")
+        
+        shown = []
         for i, result in enumerate(results):
+            shown.append(result)
             with st.expander(f"Result {i+1} - {result['document_name']} (Page {result['page_number']})"):
-                # Result metadata
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Page", result['page_number'])
-                with col2:
-                    st.metric("Chunk Type", result['chunk_type'])
-                with col3:
-                    if 'similarity_score' in result:
-                        st.metric("Similarity", f"{result['similarity_score']:.3f}")
+                # Result metadata, as one line instead of a metric widget per field
+                details = [f"Page: {result['page_number']}", f"Chunk Type: {result['chunk_type']}"]
+                if 'similarity_score' in result:
+                    details.append(f"Similarity: {result['similarity_score']:.3f}")
+                st.caption(" · ".join(details))
                 
                 # Content
                 st.subheader("📄 Content")
@@ -172,22 +205,35 @@ class SearchInterface:
                     st.text_area("Content", content, height=150, key=f"content_{i}")
                 else:
                     # Show snippet
-                    snippet = content[:300] + "..." if len(content) > 300 else content
+                    snippet = content[:SNIPPET_CHARS] + "..." if len(content) > SNIPPET_CHARS else content
                     st.text(snippet)
                 
                 # Citation information
                 st.subheader("📚 Citation")
                 citation = f"Document: {result['document_name']}, Page: {result['page_number']}, Chunk: {result['chunk_id']}"
+                # st.code carries its own copy-to-clipboard icon
                 st.code(citation)
-                
-                # Action buttons
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("📋 Copy Citation", key=f"copy_{i}"):
-                        st.code(citation)
-                with col2:
-                    if st.button("🔗 View in Context", key=f"context_{i}"):
-                        self._show_chunk_context(result)
+        
+        if not shown:
+            header.info("No results found for your query.")
+            return
+        
+        header.subheader(f"🎯 Search Results ({len(shown)} found)")
+        self._render_context_picker(shown)
+    
+    @st.fragment
+    def _render_context_picker(self, results: List[Dict[str, Any]]):
+        """Show a chosen result in context; picking one reruns only this fragment."""
+        # One picker for the whole page instead of a context button per result
+        context_index = st.selectbox(
+            "🔗 View in Context",
+            options=range(len(results)),
+            index=None,
+            format_func=lambda i: f"Result {i+1} - {results[i]['document_name']} (Page {results[i]['page_number']})",
+            placeholder="Choose a result"
+        )
+        if context_index is not None:
+            self._show_chunk_context(results[context_index])
     
     def _show_chunk_context(self, chunk: Dict[str, Any]):
         """Show chunk in context of surrounding chunks."""
@@ -201,9 +247,8 @@ class SearchInterface:
     
     def _highlight_text(self, text: str, query: str) -> str:
         """Highlight query terms in text."""
-        import re
+        if not query.strip():
+            return text
         
-        # Simple highlighting (would need more sophisticated implementation)
-        pattern = re.compile(re.escape(query), re.IGNORECASE)
-        highlighted = pattern.sub(f"**{query}**", text)
-        return highlighted
+        # Every term is highlighted in one pass, keeping the text's own casing
+        return _highlight_pattern(query).sub(lambda match: f"**{match.group(0)}**", text)
@@ -1,27 +1,38 @@
 import streamlit as st
-import os
-import tempfile
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, Any, List, Optional, Tuple
 import uuid
-from datetime import datetime
 import logging
 
-from core.document_processor import DocumentProcessor
-from core.graph_manager import GraphManager
-from core.embedding_manager import EmbeddingManager
+from ui.resources import (get_graph_manager, get_document_processor, get_cost_calculator,
+                          get_session_embedding_manager)
 from utils.progress_tracker import ProgressTracker
-from utils.cost_calculator import CostCalculator
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _extract_content(file_bytes: bytes) -> Dict[str, Any]:
+    """Parse a PDF once per distinct upload, however often it is estimated or processed."""
+    return get_document_processor().extract_pdf_content(BytesIO(file_bytes))
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _extract_and_chunk(file_bytes: bytes, chunk_size: int,
+                       chunk_overlap: int) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Content and chunks of a PDF, reused between the cost estimate and processing."""
+    processor = get_document_processor()
+    content = _extract_content(file_bytes)
+    chunks = processor.create_semantic_chunks(content, chunk_size, chunk_overlap)
+    return content, processor.assign_chunk_ids(chunks, content['file_hash'])
 
 class UploadInterface:
     """Streamlit interface for document upload and processing."""
 
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.document_processor = DocumentProcessor()
-        self.graph_manager = GraphManager()
-        self.embedding_manager = EmbeddingManager()
+        self.document_processor = get_document_processor()
+        self.graph_manager = get_graph_manager()
+        self.embedding_manager = get_session_embedding_manager()
         self.progress_tracker = ProgressTracker()
-        self.cost_calculator = CostCalculator()
+        self.cost_calculator = get_cost_calculator()
 
     def render(self):
         """Render the upload interface."""
@@ -60,7 +71,7 @@ class UploadInterface:
             # Cost estimation
             if st.button("📊 Estimate Processing Cost"):
                 with st.spinner("Analyzing document..."):
-                    cost_info = self._estimate_processing_cost(uploaded_file)
+                    cost_info = self._estimate_processing_cost(uploaded_file, chunk_size, chunk_overlap)
                     if cost_info:
                         st.subheader("💰 Cost Estimation")
                         col1, col2, col3, col4 = st.columns(4)
@@ -84,6 +95,36 @@ class UploadInterface:
                         enable_llm_processing
                     )
 
+            # Results stay on screen across reruns, e.g. toggling the sample chunks
+            self._render_processing_results(uploaded_file.name)
+
+    def _render_processing_results(self, file_name: str):
+        """Show the results of the last processed document, if it is the current upload."""
+        results = st.session_state.get('last_processed')
+        if not results or results['file_name'] != file_name:
+            return
+
+        # Display results
+        st.subheader("📊 Processing Results")
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            st.metric("Total Pages", results['total_pages'])
+        with col2:
+            st.metric("Chunks Created", results['total_chunks'])
+        with col3:
+            st.metric("Tables Extracted", results['total_tables'])
+        with col4:
+            st.metric("Processing Status", "✅ Completed")
+
+        # Show sample chunks
+        if st.checkbox("Show Sample Chunks"):
+            st.subheader("📄 Sample Chunks")
+            for i, chunk in enumerate(results['sample_chunks']):
+                with st.expander(f"Chunk {i+1} (Page {chunk['page_number']})"):
+                    st.text(chunk['content'][:500] + "..." if len(chunk['content']) > 500 else chunk['content'])
+                    st.caption(f"Words: {chunk['word_count']} | Characters: {chunk['char_count']} | Type: {chunk['chunk_type']}")
+
     def _validate_file(self, uploaded_file) -> bool:
         """Validate uploaded file."""
         if uploaded_file.size > 50 * 1024 * 1024:  # 50MB limit
@@ -96,30 +137,15 @@ class UploadInterface:
 
         return True
 
-    def _estimate_processing_cost(self, uploaded_file) -> Optional[Dict[str, Any]]:
+    def _estimate_processing_cost(self, uploaded_file, chunk_size: int,
+                                  chunk_overlap: int) -> Optional[Dict[str, Any]]:
         """Estimate processing cost for the document."""
         try:
-            # Create a temporary file to process
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                tmp_file.write(uploaded_file.read())
-                tmp_file_path = tmp_file.name
-
-            # Reset file pointer
-            uploaded_file.seek(0)
-
-            # Extract content
-            content = self.document_processor.extract_pdf_content(uploaded_file)
-
-            # Create chunks
-            chunks = self.document_processor.create_semantic_chunks(content)
+            # Extraction and chunking are cached, so processing reuses this work
+            _, chunks = _extract_and_chunk(uploaded_file.getvalue(), chunk_size, chunk_overlap)
 
             # Calculate cost
-            cost_info = self.document_processor.calculate_processing_cost(chunks)
-
-            # Clean up
-            os.unlink(tmp_file_path)
-
-            return cost_info
+            return self.document_processor.calculate_processing_cost(chunks)
 
         except Exception as e:
             st.error(f"Error estimating cost: {str(e)}")
@@ -129,50 +155,40 @@ class UploadInterface:
                          enable_embeddings: bool, enable_llm_processing: bool):
         """Process the uploaded document."""
         try:
-            # Initialize progress tracking
-            progress_placeholder = st.empty()
-            status_placeholder = st.empty()
-
             # Generate unique document ID
             doc_id = str(uuid.uuid4())
 
-            with st.spinner("Processing document..."):
-                # Step 1: Extract content
-                status_placeholder.info("📖 Extracting content from PDF...")
-                content = self.document_processor.extract_pdf_content(uploaded_file)
-
-                # Step 2: Create chunks
-                status_placeholder.info("✂️ Creating semantic chunks...")
-                self.document_processor.chunk_size = chunk_size
-                self.document_processor.chunk_overlap = chunk_overlap
-                chunks = self.document_processor.create_semantic_chunks(content)
-
-                # Step 3: Generate embeddings
-                if enable_embeddings:
-                    status_placeholder.info("🧠 Generating embeddings...")
-                    chunks = self.embedding_manager.batch_process_chunks(chunks)
+            # One status container whose label tracks the current step
+            with st.status("Processing document...", expanded=True) as status:
+                # Steps 1-2: Extract content and create chunks; cached if already estimated
+                status.update(label="📖 Extracting content and creating semantic chunks...")
+                content, chunks = _extract_and_chunk(uploaded_file.getvalue(), chunk_size, chunk_overlap)
 
-                # Step 4: Process with LLM (if enabled)
-                if enable_llm_processing:
-                    status_placeholder.info("🤖 Extracting entities with LLM...")
-                    # This would require OpenAI API key
-                    st.warning("LLM processing requires OpenAI API key in environment variables")
-
-                # Step 5: Save to Neo4j
-                status_placeholder.info("💾 Saving to Neo4j database...")
-
-                # Generate file hash
-                file_hash = self.document_processor.generate_document_hash(uploaded_file)
-
-                # Prepare document data
+                # Prepare document data; the file hash was computed during extraction
                 document_data = {
                     'name': uploaded_file.name,
-                    'file_hash': file_hash,
+                    'file_hash': content['file_hash'],
+                    'legacy_file_hash': content['legacy_file_hash'],
                     'metadata': content['metadata']
                 }
 
-                # Save to database
-                document_name = self.graph_manager.save_document(document_data, chunks)
+                # Steps 3-5: Save to Neo4j while embeddings are generated; the graph
+                # does not store embeddings, so the write need not wait for them
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    save_future = executor.submit(self.graph_manager.save_document, document_data, chunks)
+
+                    if enable_embeddings:
+                        status.update(label="🧠 Generating embeddings while saving to Neo4j...")
+                        chunks = self.embedding_manager.batch_process_chunks(chunks)
+
+                    # Process with LLM (if enabled)
+                    if enable_llm_processing:
+                        status.update(label="🤖 Extracting entities with LLM...")
+                        # This would require OpenAI API key
+                        st.warning("LLM processing requires OpenAI API key in environment variables")
+
+                    status.update(label="💾 Finishing save to Neo4j database...")
+                    document_name = save_future.result()
 
                 # Step 6: Save upload metadata
                 upload_data = {
@@ -184,32 +200,17 @@ class UploadInterface:
 
                 self.graph_manager.save_upload_metadata(upload_data)
 
-                # Clear status
-                status_placeholder.empty()
-
                 # Show success message
-                st.success("✅ Document processed successfully!")
-
-                # Display results
-                st.subheader("📊 Processing Results")
-                col1, col2, col3, col4 = st.columns(4)
-
-                with col1:
-                    st.metric("Total Pages", content['total_pages'])
-                with col2:
-                    st.metric("Chunks Created", len(chunks))
-                with col3:
-                    st.metric("Tables Extracted", len(content['tables']))
-                with col4:
-                    st.metric("Processing Status", "✅ Completed")
-
-                # Show sample chunks
-                if st.checkbox("Show Sample Chunks"):
-                    st.subheader("📄 Sample Chunks")
-                    for i, chunk in enumerate(chunks[:3]):
-                        with st.expander(f"Chunk {i+1} (Page {chunk['page_number']})"):
-                            st.text(chunk['content'][:500] + "..." if len(chunk['content']) > 500 else chunk['content'])
-                            st.caption(f"Words: {chunk['word_count']} | Characters: {chunk['char_count']} | Type: {chunk['chunk_type']}")
+                status.update(label="✅ Document processed successfully!", state="complete")
+
+                # Keep only what the results view shows, so reruns need no reprocessing
+                st.session_state['last_processed'] = {
+                    'file_name': uploaded_file.name,
+                    'total_pages': content['total_pages'],
+                    'total_chunks': len(chunks),
+                    'total_tables': len(content['tables']),
+                    'sample_chunks': chunks[:3]
+                }
 
         except Exception as e:
             st.error(f"Error processing document: {str(e)}")
@@ -1,10 +1,9 @@
 
 import logging
-from typing import Dict, Any, List
-from dataclasses import dataclass
+from typing import Dict, Any, List, NamedTuple
+from utils.token_counter import TokenCounter, WORD_TOKEN_RATIO
 
-@dataclass
-class CostBreakdown:
+class CostBreakdown(NamedTuple):
     """Cost breakdown for processing operations."""
     token_cost: float
     embedding_cost: float
@@ -12,6 +11,24 @@ class CostBreakdown:
     tokens_used: int
     embeddings_generated: int
     
+    @property
+    def cost_per_token(self) -> float:
+        """Total cost per token used, or 0 when no tokens were used."""
+        return self.total_cost / self.tokens_used if self.tokens_used > 0 else 0.0
+    
+    @property
+    def cost_per_embedding(self) -> float:
+        """Total cost per generated embedding, or 0 when none were generated."""
+        return self.total_cost / self.embeddings_generated if self.embeddings_generated > 0 else 0.0
+    
+# Cost optimization suggestions: (applies to breakdown, message), in display order
+_COST_SUGGESTION_RULES = (
+    (lambda cb: cb.total_cost > 1.0, "Consider using local embeddings to reduce costs"),
+    (lambda cb: cb.token_cost > cb.embedding_cost * 2, "Token costs are high - consider optimizing chunk sizes"),
+    (lambda cb: cb.embeddings_generated > 1000, "Large number of embeddings - consider batch processing"),
+    (lambda cb: cb.total_cost > 5.0, "High processing cost - consider splitting into smaller batches")
+)
+
 class CostCalculator:
     """Utility for calculating processing costs."""
     
@@ -24,8 +41,8 @@ class CostCalculator:
         self.embedding_cost = 0.0001  # per 1K tokens
         self.local_embedding_cost = 0.0  # Free for local models
         
-        # Token estimation multipliers
-        self.token_multiplier = 1.3  # Words to tokens ratio
+        # Exact token counts via tiktoken when installed
+        self.token_counter = TokenCounter()
         
     def estimate_chunk_processing_cost(self, chunks: List[Dict[str, Any]], 
                                      use_gpt4: bool = False,
@@ -33,12 +50,14 @@ class CostCalculator:
         """Estimate cost for processing chunks."""
         
         # Calculate total tokens
-        total_tokens = 0
-        for chunk in chunks:
-            word_count = chunk.get('word_count', 0)
-            if word_count == 0:
-                word_count = len(chunk.get('content', '').split())
-            total_tokens += int(word_count * self.token_multiplier)
+        if self.token_counter.encoding is None:
+            # Without tiktoken the estimate is word-based; chunks carry their
+            # word counts already, so only chunks lacking one are split
+            known_words = sum(chunk['word_count'] for chunk in chunks if chunk.get('word_count'))
+            missing_words = sum(len(chunk.get('content', '').split()) for chunk in chunks if not chunk.get('word_count'))
+            total_tokens = int((known_words + missing_words) * WORD_TOKEN_RATIO)
+        else:
+            total_tokens = sum(self.token_counter.count_batch([chunk.get('content', '') for chunk in chunks]))
         
         # Calculate LLM cost
         llm_cost_per_1k = self.gpt_4_cost if use_gpt4 else self.gpt_3_5_turbo_cost
@@ -87,15 +106,15 @@ class CostCalculator:
         )
     
     def get_cost_summary(self, cost_breakdown: CostBreakdown) -> Dict[str, Any]:
-        """Get formatted cost summary."""
+        """Get formatted cost summary, for display only; use CostBreakdown for the numbers."""
         return {
             'total_cost': f"${cost_breakdown.total_cost:.4f}",
             'token_cost': f"${cost_breakdown.token_cost:.4f}",
             'embedding_cost': f"${cost_breakdown.embedding_cost:.4f}",
             'tokens_used': f"{cost_breakdown.tokens_used:,}",
             'embeddings_generated': f"{cost_breakdown.embeddings_generated:,}",
-            'cost_per_token': f"${cost_breakdown.total_cost / cost_breakdown.tokens_used:.6f}" if cost_breakdown.tokens_used > 0 else "$0.000000",
-            'cost_per_embedding': f"${cost_breakdown.total_cost / cost_breakdown.embeddings_generated:.6f}" if cost_breakdown.embeddings_generated > 0 else "$0.000000"
+            'cost_per_token': f"${cost_breakdown.cost_per_token:.6f}",
+            'cost_per_embedding': f"${cost_breakdown.cost_per_embedding:.6f}"
         }
     
     def estimate_document_cost(self, file_size_mb: float, 
@@ -109,7 +128,8 @@ class CostCalculator:
         else:
             estimated_words = int(file_size_mb * 1000)
         
-        estimated_tokens = int(estimated_words * self.token_multiplier)
+        # Only a size-based guess exists here, so no text to tokenize
+        estimated_tokens = int(estimated_words * WORD_TOKEN_RATIO)
         
         # Estimate chunks (assuming 1000 words per chunk)
         estimated_chunks = max(1, estimated_words // 1000)
@@ -141,18 +161,4 @@ class CostCalculator:
     
     def optimize_cost_suggestions(self, cost_breakdown: CostBreakdown) -> List[str]:
         """Provide cost optimization suggestions."""
-        suggestions = []
-        
-        if cost_breakdown.total_cost > 1.0:
-            suggestions.append("Consider using local embeddings to reduce costs")
-        
-        if cost_breakdown.token_cost > cost_breakdown.embedding_cost * 2:
-            suggestions.append("Token costs are high - consider optimizing chunk sizes")
-        
-        if cost_breakdown.embeddings_generated > 1000:
-            suggestions.append("Large number of embeddings - consider batch processing")
-        
-        if cost_breakdown.total_cost > 5.0:
-            suggestions.append("High processing cost - consider splitting into smaller batches")
-        
-        return suggestions
+        return [message for applies, message in _COST_SUGGESTION_RULES if applies(cost_breakdown)]
@@ -1,9 +1,38 @@
 
+import functools
 import time
 import streamlit as st
 from typing import Dict, Any, Optional
 import logging
 
+# Weight of the newest step duration in the ETA's moving average
+ETA_SMOOTHING = 0.2
+
+# Minimum seconds between in-batch widget updates; each one is a message to the browser
+UI_UPDATE_INTERVAL = 0.1
+
+def _smoothed(average: Optional[float], sample: float) -> float:
+    """Fold a duration sample into an exponentially weighted moving average."""
+    if average is None:
+        return sample
+    return ETA_SMOOTHING * sample + (1 - ETA_SMOOTHING) * average
+
+@functools.lru_cache(maxsize=256)
+def _format_whole_seconds(seconds: int) -> str:
+    """Format a whole number of seconds as minutes and seconds, or hours and minutes."""
+    if seconds < 3600:
+        minutes, seconds = divmod(seconds, 60)
+        return f"{minutes}m {seconds}s"
+    hours, seconds = divmod(seconds, 3600)
+    return f"{hours}h {seconds // 60}m"
+
+def _format_time(seconds: float) -> str:
+    """Format time in human-readable format."""
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    # Longer spans only show whole seconds, so they are cached on those
+    return _format_whole_seconds(int(seconds))
+
 class ProgressTracker:
     """Utility for tracking and displaying processing progress."""
     
@@ -15,13 +44,17 @@ class ProgressTracker:
         self.step_descriptions = {}
         self.progress_bar = None
         self.status_text = None
+        self._step_time = None
+        self._last_tick = None
     
     def initialize(self, total_steps: int, step_descriptions: Dict[int, str] = None):
         """Initialize progress tracking."""
         self.total_steps = total_steps
         self.current_step = 0
         self.step_descriptions = step_descriptions or {}
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
+        self._step_time = None
+        self._last_tick = self.start_time
         
         # Create Streamlit components
         self.progress_bar = st.progress(0)
@@ -29,6 +62,11 @@ class ProgressTracker:
     
     def update_step(self, step: int, description: str = None):
         """Update current step."""
+        now = time.monotonic()
+        if self._last_tick is not None and step > self.current_step:
+            # Smooth per-step durations so one slow step does not swing the ETA
+            self._step_time = _smoothed(self._step_time, (now - self._last_tick) / (step - self.current_step))
+            self._last_tick = now
         self.current_step = step
         
         if description:
@@ -44,17 +82,16 @@ class ProgressTracker:
         # Update status text
         if self.status_text:
             current_desc = self.step_descriptions.get(step, f"Step {step}")
-            elapsed_time = time.time() - self.start_time if self.start_time else 0
+            elapsed_time = now - self.start_time if self.start_time else 0
             
             # Estimate remaining time
-            if step > 0:
-                avg_time_per_step = elapsed_time / step
+            if step > 0 and self._step_time is not None:
                 remaining_steps = self.total_steps - step
-                estimated_remaining = avg_time_per_step * remaining_steps
+                estimated_remaining = self._step_time * remaining_steps
                 
                 status = f"{current_desc} ({step}/{self.total_steps}) - "
-                status += f"Elapsed: {self._format_time(elapsed_time)} - "
-                status += f"ETA: {self._format_time(estimated_remaining)}"
+                status += f"Elapsed: {_format_time(elapsed_time)} - "
+                status += f"ETA: {_format_time(estimated_remaining)}"
             else:
                 status = f"{current_desc} ({step}/{self.total_steps})"
             
@@ -66,25 +103,12 @@ class ProgressTracker:
             self.progress_bar.progress(1.0)
         
         if self.status_text:
-            elapsed_time = time.time() - self.start_time if self.start_time else 0
-            self.status_text.text(f"✅ Completed in {self._format_time(elapsed_time)}")
-    
-    def _format_time(self, seconds: float) -> str:
-        """Format time in human-readable format."""
-        if seconds < 60:
-            return f"{seconds:.1f}s"
-        elif seconds < 3600:
-            minutes = seconds // 60
-            seconds = seconds % 60
-            return f"{int(minutes)}m {int(seconds)}s"
-        else:
-            hours = seconds // 3600
-            minutes = (seconds % 3600) // 60
-            return f"{int(hours)}h {int(minutes)}m"
+            elapsed_time = time.monotonic() - self.start_time if self.start_time else 0
+            self.status_text.text(f"✅ Completed in {_format_time(elapsed_time)}")
     
     def get_progress_info(self) -> Dict[str, Any]:
         """Get current progress information."""
-        elapsed_time = time.time() - self.start_time if self.start_time else 0
+        elapsed_time = time.monotonic() - self.start_time if self.start_time else 0
         
         return {
             'current_step': self.current_step,
@@ -105,6 +129,9 @@ class BatchProgressTracker:
         self.current_batch = 0
         self.start_time = None
         self.batch_start_time = None
+        self._item_time = None
+        self._last_tick = None
+        self._last_ui_update = 0.0
         
         # Streamlit components
         self.main_progress = None
@@ -116,7 +143,9 @@ class BatchProgressTracker:
         self.total_items = total_items
         self.processed_items = 0
         self.current_batch = 0
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
+        self._item_time = None
+        self._last_tick = self.start_time
         
         # Create Streamlit components
         st.subheader("📊 Processing Progress")
@@ -135,7 +164,7 @@ class BatchProgressTracker:
     def start_batch(self, batch_number: int):
         """Start processing a new batch."""
         self.current_batch = batch_number
-        self.batch_start_time = time.time()
+        self.batch_start_time = time.monotonic()
         
         if self.batch_progress:
             self.batch_progress.progress(0)
@@ -143,7 +172,12 @@ class BatchProgressTracker:
         self._update_status()
     
     def update_batch_progress(self, items_in_batch: int, current_item: int):
-        """Update progress within current batch."""
+        """Update progress within current batch, at most once per UI_UPDATE_INTERVAL."""
+        # The batch's last item always shows; batch starts and ends are never throttled
+        now = time.monotonic()
+        if current_item < items_in_batch and now - self._last_ui_update < UI_UPDATE_INTERVAL:
+            return
+        
         if self.batch_progress:
             batch_progress = current_item / items_in_batch
             self.batch_progress.progress(batch_progress)
@@ -154,6 +188,11 @@ class BatchProgressTracker:
         """Complete current batch."""
         self.processed_items += items_processed
         
+        now = time.monotonic()
+        if self._last_tick is not None and items_processed > 0:
+            self._item_time = _smoothed(self._item_time, (now - self._last_tick) / items_processed)
+            self._last_tick = now
+        
         if self.main_progress:
             overall_progress = self.processed_items / self.total_items
             self.main_progress.progress(overall_progress)
@@ -168,32 +207,19 @@ class BatchProgressTracker:
         if not self.status_text:
             return
         
-        elapsed_time = time.time() - self.start_time if self.start_time else 0
+        self._last_ui_update = time.monotonic()
+        elapsed_time = self._last_ui_update - self.start_time if self.start_time else 0
         
-        # Calculate ETA
-        if self.processed_items > 0:
-            avg_time_per_item = elapsed_time / self.processed_items
+        # Calculate ETA from the smoothed per-item time
+        if self.processed_items > 0 and self._item_time is not None:
             remaining_items = self.total_items - self.processed_items
-            estimated_remaining = avg_time_per_item * remaining_items
+            estimated_remaining = self._item_time * remaining_items
             
             status = f"Processing batch {self.current_batch} - "
             status += f"{self.processed_items}/{self.total_items} items - "
-            status += f"Elapsed: {self._format_time(elapsed_time)} - "
-            status += f"ETA: {self._format_time(estimated_remaining)}"
+            status += f"Elapsed: {_format_time(elapsed_time)} - "
+            status += f"ETA: {_format_time(estimated_remaining)}"
         else:
             status = f"Starting batch {self.current_batch}..."
         
         self.status_text.text(status)
-    
-    def _format_time(self, seconds: float) -> str:
-        """Format time in human-readable format."""
-        if seconds < 60:
-            return f"{seconds:.1f}s"
-        elif seconds < 3600:
-            minutes = seconds // 60
-            seconds = seconds % 60
-            return f"{int(minutes)}m {int(seconds)}s"
-        else:
-            hours = seconds // 3600
-            minutes = (seconds % 3600) // 60
-            return f"{int(hours)}h {int(minutes)}m"
@@ -0,0 +1,49 @@
+
+import logging
+import importlib
+import os
+from typing import List
+
+# Words-to-tokens ratio used when tiktoken is unavailable
+WORD_TOKEN_RATIO = 1.3
+
+# Threads tiktoken's Rust encoder spreads a batch over
+ENCODE_THREADS = os.cpu_count() or 1
+
+class TokenCounter:
+    """Counts LLM tokens with tiktoken, falling back to a word-based estimate."""
+
+    def __init__(self, model: str = "gpt-3.5-turbo"):
+        self.logger = logging.getLogger(__name__)
+        self.model = model
+        self._encoding = None
+        self._encoding_loaded = False
+
+    @property
+    def encoding(self):
+        """The tiktoken encoding for the model, loaded once on first use."""
+        if not self._encoding_loaded:
+            self._encoding_loaded = True
+            try:
+                tiktoken = importlib.import_module('tiktoken')
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                self.logger.warning(f"tiktoken unavailable, estimating tokens from words: {str(e)}")
+                self._encoding = None
+        return self._encoding
+
+    def count(self, text: str) -> int:
+        """Count tokens in a single text."""
+        if self.encoding is None:
+            return int(len(text.split()) * WORD_TOKEN_RATIO)
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        """Count tokens for many texts; tiktoken encodes the batch in parallel."""
+        if self.encoding is None:
+            return [int(len(text.split()) * WORD_TOKEN_RATIO) for text in texts]
+        encoded = self.encoding.encode_batch(texts, num_threads=ENCODE_THREADS, disallowed_special=())
+        return [len(tokens) for tokens in encoded]